@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from langchain_core.messages import BaseMessage
 from langgraph.graph import StateGraph, END
 from langchain_google_genai import ChatGoogleGenerativeAI
+from functools import lru_cache
 import os
 from dotenv import load_dotenv
 
@@ -38,22 +39,29 @@ class GraphState(TypedDict):
     messages: List[BaseMessage]
     user_preferences: PreferencesModel
     search_queries: List[SearchQuery]
+    has_user_message: bool  # set when user input is appended, so nodes don't scan the log
+
+# ---------------------
+# LLM Clients
+# ---------------------
+# Built once at import and shared by every graph step, so the structured-output
+# schemas are converted to Gemini function specs only once
+llm = ChatGoogleGenerativeAI(
+    model="gemini-2.5-flash-lite",
+    temperature=0,
+    api_key=os.getenv("GEMINI_API_KEY")
+)
+llm_structured = llm.with_structured_output(PreferencesModel)
+
+query_llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0.3, api_key=os.getenv("GEMINI_API_KEY"))
+# We want the LLM to output a list of SearchQuery objects
+query_llm_structured = query_llm.with_structured_output(SearchQueries)
 
 # ---------------------
 # Collect Preferences
 # ---------------------
 def travel_preferences_node(state: GraphState):
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash-lite",
-        temperature=0,
-        api_key=os.getenv("GEMINI_API_KEY")
-    )
-    
-    llm_structured = llm.with_structured_output(PreferencesModel)
-
-    user_messages = [m for m in state['messages'] if m['role'] == 'user']
-    
-    if not user_messages:
+    if not state.get('has_user_message'):
         # First run: include a placeholder user message
         greeting_prompt = [
             {"role": "system", "content": (
@@ -83,12 +91,6 @@ def generate_search_queries_node(state: GraphState):
     """Generates a strategic list of search queries based on user preferences."""
     print("--- GENERATING SEARCH QUERIES ---")
     
-    # Use your preferred LLM setup
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0.3, api_key=os.getenv("GEMINI_API_KEY"))
-    
-    # We want the LLM to output a list of SearchQuery objects
-    structured_llm = llm.with_structured_output(SearchQueries)
-    
     preferences = state['user_preferences']
 
     # This prompt is key. It guides the LLM to think like a planner.
@@ -114,7 +116,7 @@ def generate_search_queries_node(state: GraphState):
 
     # Invoke the LLM to get the structured search plan
     try:
-        search_queries_model = structured_llm.invoke(query_generator_prompt)
+        search_queries_model = query_llm_structured.invoke(query_generator_prompt)
         search_queries = search_queries_model.queries
         state['search_queries'] = search_queries
         
@@ -139,32 +141,43 @@ def generate_search_queries_node(state: GraphState):
 # ---------------------
 # Build Graph
 # ---------------------
-graph_builder = StateGraph(GraphState)
-graph_builder.add_node("travel_preferences", travel_preferences_node)
-graph_builder.add_node("generate_queries", generate_search_queries_node)
-graph_builder.set_entry_point("travel_preferences")
-graph_builder.add_edge("travel_preferences", "generate_queries")
-graph_builder.add_edge("generate_queries", END)
-
-graph = graph_builder.compile()
+@lru_cache(maxsize=1)
+def get_graph():
+    """Builds and compiles the graph on first use; importing this module doesn't."""
+    graph_builder = StateGraph(GraphState)
+    graph_builder.add_node("travel_preferences", travel_preferences_node)
+    graph_builder.add_node("generate_queries", generate_search_queries_node)
+    graph_builder.set_entry_point("travel_preferences")
+    graph_builder.add_edge("travel_preferences", "generate_queries")
+    graph_builder.add_edge("generate_queries", END)
+
+    return graph_builder.compile()
 
 # ---------------------
 # Run Graph
 # ---------------------
-print("Starting travel assistant...")
-inputs = {
-    'messages': []
-}
-
-while True:
-    for s in graph.stream(inputs):
-        # Print the last assistant message if it exists
-        messages = s['travel_preferences']['messages']
-        if messages and messages[-1]['role'] == 'assistant':
-            print(messages[-1]['content'])
-
-    x = input("You: ")
-    if x.lower() in ['exit', 'quit']:
-        break
-
-    inputs['messages'].append({"role": "user", "content": x})
+def _cli():
+    graph = get_graph()
+
+    print("Starting travel assistant...")
+    inputs = {
+        'messages': []
+    }
+
+    while True:
+        for s in graph.stream(inputs):
+            # Print the last assistant message if it exists
+            messages = s['travel_preferences']['messages']
+            if messages and messages[-1]['role'] == 'assistant':
+                print(messages[-1]['content'])
+
+        x = input("You: ")
+        if x.lower() in ['exit', 'quit']:
+            break
+
+        inputs['messages'].append({"role": "user", "content": x})
+        inputs['has_user_message'] = True
+
+
+if __name__ == "__main__":
+    _cli()
@@ -1,24 +1,43 @@
 import os
+import re
 import json
 import uuid
+from functools import lru_cache
 from typing import TypedDict, List, Annotated, Any
 from dotenv import load_dotenv
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import trim_messages
 from langchain_core.tools import tool
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
 from langgraph.graph.message import add_messages
+from langgraph.checkpoint.memory import MemorySaver
 
 from langchain_openai import ChatOpenAI
 import chromadb
+from chromadb.utils import embedding_functions
+from cachetools import LRUCache
 
 load_dotenv(override=True)
 
 
-WORKING_MEMORY_FILE = "working_memory.json"
-client = chromadb.PersistentClient(path="./chroma_db")
-archival_collection = client.get_or_create_collection(name="archival_memory")
+WORKING_MEMORY_DIR = "working_memory"
+WORKING_MEMORY_FILE = "working_memory.json"  # pre-split format, still read as a fallback
+# Prompt budget per agent call (mirrors settings.MAX_CONTEXT_TOKENS); older turns are trimmed first
+MAX_CONTEXT_TOKENS = 8000
+
+
+# Chroma, its embedding model and the OpenAI client are created on first use, so importing
+# this module doesn't open the database or load the model
+@lru_cache(maxsize=1)
+def _get_embedding_fn():
+    # Chroma's default embedder, held explicitly so query embeddings can be cached and batched here
+    return embedding_functions.DefaultEmbeddingFunction()
+
+@lru_cache(maxsize=1)
+def _get_archival():
+    client = chromadb.PersistentClient(path="./chroma_db")
+    return client.get_or_create_collection(name="archival_memory", embedding_function=_get_embedding_fn())
 
 
 
@@ -30,22 +49,42 @@ class GraphState(TypedDict):
 
 
 
-# --- Helper Functions (Unchanged) ---
+# --- Helper Functions ---
+# One compact JSON file per session, so a save rewrites only that session's facts.
+# Facts are cached in memory and a file is re-read only when its mtime changes.
+_memory_cache: dict = {}  # session_id -> (mtime_ns, facts)
+
+def _working_memory_path(session_id: str) -> str:
+    # Session ids come back through tool arguments, so keep them from escaping the directory
+    return os.path.join(WORKING_MEMORY_DIR, re.sub(r"[^\w.-]", "_", session_id) + ".json")
+
+def _load_legacy_working_memory(session_id: str) -> List[str]:
+    """Facts saved in the old single-file format, read until the session is saved again."""
+    try:
+        with open(WORKING_MEMORY_FILE, 'r') as f: return json.load(f).get(session_id, [])
+    except (FileNotFoundError, json.JSONDecodeError): return []
+
 def load_working_memory(session_id: str) -> List[str]:
-    if not os.path.exists(WORKING_MEMORY_FILE): return []
-    with open(WORKING_MEMORY_FILE, 'r') as f:
-        try: data = json.load(f)
-        except json.JSONDecodeError: return []
-    return data.get(session_id, [])
+    path = _working_memory_path(session_id)
+    try: mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return list(_load_legacy_working_memory(session_id))
+    cached = _memory_cache.get(session_id)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'r') as f:
+            try: facts = json.load(f)
+            except json.JSONDecodeError: facts = []
+        cached = _memory_cache[session_id] = (mtime, facts)
+    return list(cached[1])
 
 def save_working_memory(session_id: str, facts: List[str]):
-    data = {}
-    if os.path.exists(WORKING_MEMORY_FILE):
-        try:
-            with open(WORKING_MEMORY_FILE, 'r') as f: data = json.load(f)
-        except json.JSONDecodeError: data = {}
-    data[session_id] = facts
-    with open(WORKING_MEMORY_FILE, 'w') as f: json.dump(data, f, indent=4)
+    path = _working_memory_path(session_id)
+    os.makedirs(WORKING_MEMORY_DIR, exist_ok=True)
+    # Write to a temp file and swap it in so readers never see a half-written file
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'w') as f: json.dump(list(facts), f, separators=(",", ":"))
+    os.replace(tmp_file, path)
+    _memory_cache[session_id] = (os.stat(path).st_mtime_ns, list(facts))
 
 
 
@@ -59,38 +98,75 @@ def add_to_working_context(session_id: str, fact: str) -> str:
     if fact not in facts: facts.append(fact)
     save_working_memory(session_id, facts)
     return f"Successfully added to working context: '{fact}'."
+
+
+_query_embeddings = LRUCache(maxsize=256)
+
+def _embed_queries(queries: List[str]) -> List[List[float]]:
+    """Embeds queries in one forward pass, skipping any seen recently."""
+    keys = [" ".join(q.lower().split()) for q in queries]
+    misses = list(dict.fromkeys(k for k in keys if k not in _query_embeddings))
+    if misses:
+        for key, embedding in zip(misses, _get_embedding_fn()(misses)):
+            _query_embeddings[key] = list(embedding)
+    return [_query_embeddings[k] for k in keys]
+
+def search_archive_batch(queries: List[str]) -> List[str]:
+    """Runs several archive searches with a single Chroma query."""
+    results = _get_archival().query(query_embeddings=_embed_queries(queries), n_results=2)
+    formatted = []
+    for retrieved_docs in results.get('documents') or [[] for _ in queries]:
+        if not retrieved_docs: formatted.append("No relevant facts found in the archive.")
+        else: formatted.append("Found relevant facts:\n- " + "\n- ".join(retrieved_docs))
+    return formatted
+
 @tool
 def search_archive(query: str) -> str:
     """Performs a semantic search on the long-term vector database."""
     print(f"--- TOOL: Searching archive for: '{query}' ---")
-    results = archival_collection.query(query_texts=[query], n_results=2)
-    retrieved_docs = results.get('documents', [[]])[0]
-    if not retrieved_docs: return "No relevant facts found in the archive."
-    return "Found relevant facts:\n- " + "\n- ".join(retrieved_docs)
+    return search_archive_batch([query])[0]
 
 
 
 tools = [add_to_working_context, search_archive]
-llm_with_tools = ChatOpenAI(model="gpt-4o-mini", temperature=0).bind_tools(tools)
-tool_node = ToolNode(tools=tools)
+tools_by_name = {t.name: t for t in tools}
 
 
+@lru_cache(maxsize=1)
+def _get_llm():
+    return ChatOpenAI(model="gpt-4o-mini", temperature=0)
 
+@lru_cache(maxsize=1)
+def _get_llm_with_tools():
+    return _get_llm().bind_tools(tools)
+
+
+def tool_node(state: GraphState) -> dict[str, Any]:
+    """Runs the agent's tool calls, folding every search_archive call of the turn into one batched query."""
+    tool_calls = state["messages"][-1].tool_calls
+    outputs = {}
+
+    search_calls = [c for c in tool_calls if c["name"] == "search_archive"]
+    if search_calls:
+        queries = [c["args"].get("query", "") for c in search_calls]
+        print(f"--- TOOL: Searching archive for: {queries} ---")
+        for call, result in zip(search_calls, search_archive_batch(queries)):
+            outputs[call["id"]] = result
+
+    for call in tool_calls:
+        if call["id"] in outputs: continue
+        if call["name"] in tools_by_name:
+            outputs[call["id"]] = tools_by_name[call["name"]].invoke(call["args"])
+        else:
+            outputs[call["id"]] = f"Error: unknown tool '{call['name']}'."
+
+    return {"messages": [ToolMessage(content=outputs[c["id"]], name=c["name"], tool_call_id=c["id"]) for c in tool_calls]}
 
-# --- Agent Node ---
-def agent_node(state: GraphState) -> dict[str, Any]:
-    """
-    This single node decides everything:
-    1. Answer directly from context if possible.
-    2. Call a tool if new info is provided or a search is needed.
-    3. Confirm that a tool has been used.
-    """
-    print("--- AGENT: Processing... ---")
-    session_id = state['session_id']
-    facts = load_working_memory(session_id)
-    working_context_str = "\n".join([f"- {fact}" for fact in facts])
 
-    system_prompt = f"""
+
+
+# --- Agent Node ---
+SYSTEM_PROMPT_TEMPLATE = """
 You are a helpful and concise AI assistant with a memory system.
 
 **Your Top Priority: Answer the user's question directly if you can.**
@@ -103,12 +179,38 @@ Review the conversation history and the Working Context. If the answer is there,
 **After a tool is used**, provide a brief, simple confirmation. (e.g., "Okay, I've saved that.")
 
 CURRENT WORKING CONTEXT:
-{working_context_str}
+{working_context}
 
 SESSION ID FOR TOOLS: "{session_id}"
 """
-    messages = [SystemMessage(content=system_prompt)] + state["messages"]
-    response = llm_with_tools.invoke(messages)
+
+@lru_cache(maxsize=128)
+def build_system_prompt(facts: tuple, session_id: str) -> str:
+    """Renders the system prompt; repeated turns with unchanged facts reuse the cached string."""
+    working_context_str = "\n".join([f"- {fact}" for fact in facts])
+    return SYSTEM_PROMPT_TEMPLATE.format(working_context=working_context_str, session_id=session_id)
+
+def agent_node(state: GraphState) -> dict[str, Any]:
+    """
+    This single node decides everything:
+    1. Answer directly from context if possible.
+    2. Call a tool if new info is provided or a search is needed.
+    3. Confirm that a tool has been used.
+    """
+    print("--- AGENT: Processing... ---")
+    session_id = state['session_id']
+    facts = load_working_memory(session_id)
+    system_prompt = build_system_prompt(tuple(facts), session_id)
+
+    messages = trim_messages(
+        [SystemMessage(content=system_prompt)] + state["messages"],
+        max_tokens=MAX_CONTEXT_TOKENS,
+        token_counter=_get_llm(),
+        strategy="last",
+        include_system=True,
+        start_on="human",  # never leave a ToolMessage without the AI call that requested it
+    )
+    response = _get_llm_with_tools().invoke(messages)
     return {"messages": [response]}
 
 
@@ -124,48 +226,55 @@ def router(state: GraphState) -> str:
 
 
 # --- The Graph Definition ---
-graph_builder = StateGraph(GraphState)
-graph_builder.add_node("agent", agent_node)
-graph_builder.add_node("tools", tool_node)
-graph_builder.set_entry_point("agent")
-graph_builder.add_edge("tools", "agent")
-graph_builder.add_conditional_edges(
-    "agent",
-    router,
-    {
-        "tools": "tools",
-        "__end__": END 
-    }
-)
-graph = graph_builder.compile()
+@lru_cache(maxsize=1)
+def get_graph():
+    """Builds and compiles the graph on first use; importing this module doesn't."""
+    graph_builder = StateGraph(GraphState)
+    graph_builder.add_node("agent", agent_node)
+    graph_builder.add_node("tools", tool_node)
+    graph_builder.set_entry_point("agent")
+    graph_builder.add_edge("tools", "agent")
+    graph_builder.add_conditional_edges(
+        "agent",
+        router,
+        {
+            "tools": "tools",
+            "__end__": END 
+        }
+    )
+    # Checkpoints each session's state by thread_id, so the chat loop only sends the new message
+    return graph_builder.compile(checkpointer=MemorySaver())
 
 
 
 
 # --- The Chat Loop  ---
-session_id = f"session_{uuid.uuid4()}"
-current_state = {"messages": [], "session_id": session_id}
-print("Starting assistant. Type 'quit' or 'exit' to end.")
-
-while True:
-    user_input = input("You: ")
-    if user_input.lower() in ["quit", "exit"]:
-        print("Assistant: Goodbye!")
-        break
-
-    current_state["messages"].append(HumanMessage(content=user_input))
-
-    final_message_content = ""
-    for step in graph.stream(current_state):
-        node, output = list(step.items())[0]
-        # Always update the full state
-        current_state["messages"].extend(output.get("messages", []))
-        
-        # Capture the last content message before the graph ends
-        if node == "agent" and not output.get("messages", [{}])[-1].tool_calls:
-            last_msg = output.get("messages", [{}])[-1]
-            if last_msg and last_msg.content:
-                final_message_content = last_msg.content
-
-    if final_message_content:
-        print(f"Assistant: {final_message_content}\n")
\ No newline at end of file
+def _cli():
+    graph = get_graph()
+    session_id = f"session_{uuid.uuid4()}"
+    config = {"configurable": {"thread_id": session_id}}
+    print("Starting assistant. Type 'quit' or 'exit' to end.")
+
+    while True:
+        user_input = input("You: ")
+        if user_input.lower() in ["quit", "exit"]:
+            print("Assistant: Goodbye!")
+            break
+
+        final_message_content = ""
+        turn_input = {"messages": [HumanMessage(content=user_input)], "session_id": session_id}
+        for step in graph.stream(turn_input, config):
+            node, output = list(step.items())[0]
+
+            # Capture the last content message before the graph ends
+            if node == "agent" and not output.get("messages", [{}])[-1].tool_calls:
+                last_msg = output.get("messages", [{}])[-1]
+                if last_msg and last_msg.content:
+                    final_message_content = last_msg.content
+
+        if final_message_content:
+            print(f"Assistant: {final_message_content}\n")
+
+
+if __name__ == "__main__":
+    _cli()
@@ -0,0 +1,22 @@
+# _shared.py
+#
+# basic_agent runs from its own directory but reuses the MCP client, LLM cache and geocode cache
+# maintained under travel_planner/. Importing this module first puts travel_planner on the path
+# so the shims in this directory can re-export those modules instead of keeping copies that drift.
+#
+# Those modules load travel_planner's config.settings, which requires GEMINI_API_KEY. Set it in
+# the environment or in basic_agent/.env (loaded here, before the settings are built); without it
+# importing any of the shims fails with a pydantic ValidationError.
+
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+
+TRAVEL_PLANNER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "travel_planner")
+# Front of the path: travel_planner's packages have generic names (tools, utils, config, models)
+# that an installed distribution could otherwise shadow
+if TRAVEL_PLANNER_DIR not in sys.path:
+    sys.path.insert(0, TRAVEL_PLANNER_DIR)
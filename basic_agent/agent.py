@@ -3,12 +3,33 @@ from pydantic import BaseModel, Field
 from langchain_core.messages import BaseMessage
 from langgraph.graph import StateGraph, END
 from langchain_google_genai import ChatGoogleGenerativeAI
-from mcp_client import MCPClient
+from mcp_client import MCPBatchNotSupported, MCPBatchToolUnavailable, close_async_client, get_mcp
+from llm_cache import SemanticLLMCache, dedupe_queries
+from geocode_cache import geocode_destination
+from memory_service import get_memory_service
+from collections import defaultdict
+from functools import lru_cache
+from heapq import nlargest
+from operator import itemgetter
+import asyncio
+import logging
 import os
+import sys
 
 from dotenv import load_dotenv
 load_dotenv(override=True)
 
+logger = logging.getLogger(__name__)
+
+# Cap on in-flight MCP searches so a burst of queries doesn't trip rate limits
+MAX_CONCURRENT_SEARCHES = 8
+
+# Flipped off once the MCP server turns out not to have the batched search tool, so later runs go straight to concurrent calls
+_mcp_batch_supported = True
+
+# Places rendered per category in the final plan
+TOP_PLACES_PER_CATEGORY = 3
+
 
 # ---------------------
 # MODELS
@@ -41,6 +62,7 @@ class PlaceResult(BaseModel):
     rating: float = None
     types: List[str] = []
     category: str  # From our search query
+    categories: List[str] = []  # Every query category that found this place, `category` first
     priority: int  # From our search query
 
 class TravelPlan(BaseModel):
@@ -50,6 +72,10 @@ class TravelPlan(BaseModel):
     places_by_category: Dict[str, List[PlaceResult]]
     recommendations: List[str]
 
+# Finalize the schemas at import so pydantic doesn't build them lazily inside the first node call
+for _model in (PreferencesModel, SearchQuery, SearchQueries, PlaceResult, TravelPlan):
+    _model.model_rebuild()
+
 # ---------------------
 # Graph State
 # ---------------------
@@ -57,8 +83,13 @@ class GraphState(TypedDict):
     messages: List[BaseMessage]
     user_preferences: PreferencesModel
     search_queries: List[SearchQuery]
+    destination_coords: Dict[str, float]
     search_results: List[PlaceResult]
     travel_plan: TravelPlan
+    user_id: str
+    message_counts: Dict[str, int]  # per-role tallies kept by push_message, so nodes don't rescan the log
+    core_memory: Dict[str, Any]
+    similar_past_trips: List[Dict[str, Any]]
 
 # ---------------------
 # Memory States
@@ -81,147 +112,221 @@ class RecallMemory(BaseModel):
     timestamp: str
     embedding: List[float] = None
 
+# ---------------------
+# LLM RESPONSE CACHES
+# ---------------------
+def _normalize_preferences(preferences: PreferencesModel) -> Dict[str, Any]:
+    """Canonical form of the preferences, used as the exact cache key for query plans."""
+    normalized = {}
+    for key, value in preferences.model_dump().items():
+        if isinstance(value, str):
+            value = value.strip().lower()
+        elif isinstance(value, list):
+            value = sorted(str(v).strip().lower() for v in value)
+        normalized[key] = value
+    return normalized
+
+search_queries_cache = SemanticLLMCache(SearchQueries, namespace="search_queries", ttl_seconds=24 * 60 * 60)
+
+# ---------------------
+# LLM CLIENTS
+# ---------------------
+LLM_MODEL = "gemini-2.5-flash-lite"
+
+@lru_cache(maxsize=None)
+def get_llm(model: str, temperature: float) -> ChatGoogleGenerativeAI:
+    """Build each (model, temperature) client once and reuse it across graph steps."""
+    return ChatGoogleGenerativeAI(model=model, temperature=temperature, api_key=os.getenv("GEMINI_API_KEY"))
+
+@lru_cache(maxsize=None)
+def get_structured(model: str, temperature: float, schema_cls: type):
+    """Structured-output runnable for `schema_cls`, so the tool schema is only generated once."""
+    return get_llm(model, temperature).with_structured_output(schema_cls)
+
+PREFERENCES_SYSTEM_MESSAGE = {"role": "system", "content": "Extract travel preferences from the conversation. If some information is missing, make reasonable defaults."}
+
+QUERY_GENERATOR_PROMPT = """
+    Create 6-8 strategic Google Maps search queries for {destination} based on these preferences:
+    
+    - Duration: {duration}
+    - Budget: {budget}
+    - Companions: {companions}
+    - Interests: {interests}
+    - Must-See: {must_see}
+    
+    Generate diverse queries covering:
+    - Top attractions matching their interests
+    - Restaurants fitting their budget
+    - Activities suitable for their companions
+    - Must-see items they mentioned
+    
+    Make queries specific to the destination and prioritize based on their stated interests.
+    """
+
 # ---------------------
 # NODE FUNCTIONS
 # ---------------------
+def push_message(state: GraphState, role: str, content: str):
+    """Append a chat message and bump its role's count; all message writes go through here."""
+    state['messages'].append({"role": role, "content": content})
+    counts = state.setdefault('message_counts', {})
+    counts[role] = counts.get(role, 0) + 1
+
 def travel_preferences_node(state: GraphState):
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash-lite",
-        temperature=0,
-        api_key=os.getenv("GEMINI_API_KEY")
-    )
-    
-    llm_structured = llm.with_structured_output(PreferencesModel)
+    llm_structured = get_structured(LLM_MODEL, 0, PreferencesModel)
 
-    user_messages = [m for m in state['messages'] if m.get('role') == 'user']
-    
-    if not user_messages:
+    if not state.get('message_counts', {}).get('user', 0):
         # First run: greet the user
         greeting = "Hi! I'm your travel planning assistant. I'll help you create a personalized travel plan. Could you tell me about your travel preferences? For example:\n- Where would you like to go?\n- How long is your trip?\n- What's your budget like?\n- Who are you traveling with?\n- What are you interested in?"
-        state['messages'].append({"role": "assistant", "content": greeting})
+        push_message(state, "assistant", greeting)
         return state
     else:
-        # Check if we have enough information to extract preferences
-        conversation_text = "\n".join([m.get('content', '') for m in state['messages']])
-        
+        # Check if we have enough information to extract preferences; the chat history
+        # goes to the model as-is rather than being re-joined into one string every turn.
+        # Not cached: the extraction depends on the whole conversation, which only repeats on a replay
         try:
-            preferences = llm_structured.invoke([
-                {"role": "system", "content": "Extract travel preferences from the conversation. If some information is missing, make reasonable defaults."},
-                {"role": "user", "content": conversation_text}
-            ])
+            preferences = llm_structured.invoke([PREFERENCES_SYSTEM_MESSAGE] + state['messages'])
             state['user_preferences'] = preferences
-            state['messages'].append({
-                "role": "assistant",
-                "content": f"Perfect! I understand you want to visit {preferences.destination} for {preferences.duration} with a {preferences.budget} budget. Let me start planning your trip!"
-            })
+            push_message(state, "assistant", f"Perfect! I understand you want to visit {preferences.destination} for {preferences.duration} with a {preferences.budget} budget. Let me start planning your trip!")
         except Exception as e:
-            state['messages'].append({
-                "role": "assistant",
-                "content": "I need a bit more information. Could you tell me your destination and what you're interested in doing?"
-            })
+            push_message(state, "assistant", "I need a bit more information. Could you tell me your destination and what you're interested in doing?")
 
     return state
 
-def generate_search_queries_node(state: GraphState):
-    """Generates a strategic list of search queries based on user preferences."""
+async def generate_search_queries_node(state: GraphState):
+    """Generates a strategic list of search queries based on user preferences.
+
+    The destination is geocoded while the LLM is generating, so the search node finds
+    the coordinates already in state.
+    """
     if 'user_preferences' not in state:
         return state
     
-    print("--- GENERATING SEARCH QUERIES ---")
+    logger.info("--- GENERATING SEARCH QUERIES ---")
     
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0.3, api_key=os.getenv("GEMINI_API_KEY"))
-    structured_llm = llm.with_structured_output(SearchQueries)
+    structured_llm = get_structured(LLM_MODEL, 0.3, SearchQueries)
     
     preferences = state['user_preferences']
+    prompt_fields = preferences.model_dump()
+    prompt_fields['interests'] = ', '.join(preferences.interests)
+    prompt_fields['must_see'] = ', '.join(preferences.must_see) if preferences.must_see else 'None'
+    query_generator_prompt = QUERY_GENERATOR_PROMPT.format_map(prompt_fields)
 
-    query_generator_prompt = f"""
-    Create 6-8 strategic Google Maps search queries for {preferences.destination} based on these preferences:
-    
-    - Duration: {preferences.duration}
-    - Budget: {preferences.budget}
-    - Companions: {preferences.companions}
-    - Interests: {', '.join(preferences.interests)}
-    - Must-See: {', '.join(preferences.must_see) if preferences.must_see else 'None'}
-    
-    Generate diverse queries covering:
-    - Top attractions matching their interests
-    - Restaurants fitting their budget
-    - Activities suitable for their companions
-    - Must-see items they mentioned
-    
-    Make queries specific to the destination and prioritize based on their stated interests.
-    """
+    geocode_task = asyncio.create_task(asyncio.to_thread(geocode_destination, preferences.destination))
 
     try:
-        search_queries_model = structured_llm.invoke(query_generator_prompt)
-        search_queries = search_queries_model.queries
+        # Query generation runs at temperature 0.3, so key the cache on the preferences
+        # themselves rather than on free-form prompt similarity
+        search_queries_model = await asyncio.to_thread(
+            search_queries_cache.invoke,
+            structured_llm,
+            query_generator_prompt,
+            user_id=state.get('user_id', 'default_user'),
+            cache_key=_normalize_preferences(preferences)
+        )
+        search_queries = await asyncio.to_thread(dedupe_queries, search_queries_model.queries, search_queries_cache)
         state['search_queries'] = search_queries
         
-        state['messages'].append({
-            "role": "assistant", 
-            "content": f"I've created {len(search_queries)} targeted searches to find the best spots for you. Let me search for places now..."
-        })
-        print(f"Generated {len(search_queries)} queries")
+        push_message(state, "assistant", f"I've created {len(search_queries)} targeted searches to find the best spots for you. Let me search for places now...")
+        logger.info("Generated %d queries", len(search_queries))
+
+    except Exception as e:
+        logger.error("Error generating search queries: %s", e)
+        push_message(state, "assistant", f"I had trouble creating the search plan. Let me try a different approach.")
 
+    try:
+        state['destination_coords'] = await geocode_task
     except Exception as e:
-        print(f"Error generating search queries: {e}")
-        state['messages'].append({
-            "role": "assistant",
-            "content": f"I had trouble creating the search plan. Let me try a different approach."
-        })
+        logger.warning("Error geocoding %s: %s", preferences.destination, e)
 
     return state
 
-def execute_searches_node(state: GraphState):
-    """Execute the search queries using the MCP server."""
+async def execute_searches_node(state: GraphState):
+    """Execute the search queries concurrently using the MCP server."""
     if 'search_queries' not in state or 'user_preferences' not in state:
         return state
     
-    print("--- EXECUTING SEARCHES ---")
+    logger.info("--- EXECUTING SEARCHES ---")
     
-    mcp_client = MCPClient()
+    mcp_client = get_mcp()
     preferences = state['user_preferences']
+    queries = state['search_queries']
     all_results = []
     
-    # First, geocode the destination to get coordinates for location-based searches
-    destination_coords = mcp_client.geocode(preferences.destination)
+    # Coordinates for location-based searches, normally resolved alongside query generation
+    destination_coords = state.get('destination_coords')
+    if destination_coords is None:
+        destination_coords = await asyncio.to_thread(geocode_destination, preferences.destination)
     
-    for query in state['search_queries']:
-        print(f"Searching: {query.query} (Priority: {query.priority})")
-        
-        # Search for places
-        places = mcp_client.search_places(
-            query.query, 
-            location=destination_coords if destination_coords else None,
-            radius=10000  # 10km radius
-        )
-        
-        # Convert to our PlaceResult model
-        for place in places[:5]:  # Limit to top 5 results per query
-            try:
-                place_result = PlaceResult(
+    location = destination_coords if destination_coords else None
+    radius = 10000  # 10km radius
+    results_per_query = None
+
+    # Preferred path: every search in one maps_search_places_batch call (one POST, one SSE stream)
+    global _mcp_batch_supported
+    if _mcp_batch_supported:
+        for query in queries:
+            logger.debug("Searching: %s (Priority: %d)", query.query, query.priority)
+        try:
+            results_per_query = await mcp_client.asearch_places_batch(
+                [q.query for q in queries], location=location, radius=radius
+            )
+        except MCPBatchToolUnavailable as e:
+            logger.warning("Batched search unavailable, using concurrent calls from now on: %s", e)
+            _mcp_batch_supported = False
+        except MCPBatchNotSupported as e:
+            logger.warning("Batched search failed, falling back to concurrent calls for this plan: %s", e)
+
+    if results_per_query is None:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+
+        async def search(query: SearchQuery) -> List[Dict]:
+            async with semaphore:
+                logger.debug("Searching: %s (Priority: %d)", query.query, query.priority)
+                return await mcp_client.asearch_places(query.query, location=location, radius=radius)
+
+        # Fire all searches at once; total latency is the slowest query, not the sum
+        results_per_query = await asyncio.gather(*(search(q) for q in queries), return_exceptions=True)
+
+    seen_places: Dict[str, PlaceResult] = {}  # place_id -> its entry in all_results
+    for query, places in zip(queries, results_per_query):
+        if isinstance(places, Exception):
+            logger.error("Error searching for %s: %s", query.query, places)
+            continue
+
+        # Convert to our PlaceResult model. The dicts come straight from our own MCP server,
+        # so skip pydantic validation for these internal objects (top 5 results per query)
+        try:
+            for place in places[:5]:
+                place_id = place.get('place_id', '')
+                if place_id in seen_places:
+                    # Overlapping queries found the same place; keep one entry and record the category
+                    categories = seen_places[place_id].categories
+                    if query.category not in categories:
+                        categories.append(query.category)
+                    continue
+                result = PlaceResult.model_construct(
                     name=place.get('name', ''),
                     formatted_address=place.get('formatted_address', ''),
-                    location=place.get('location', {}),
-                    place_id=place.get('place_id', ''),
+                    location=place.get('location') or {},
+                    place_id=place_id,
                     rating=place.get('rating'),
-                    types=place.get('types', []),
+                    types=place.get('types') or [],
                     category=query.category,
+                    categories=[query.category],
                     priority=query.priority
                 )
-                all_results.append(place_result)
-            except Exception as e:
-                print(f"Error processing place result: {e}")
-                continue
+                if place_id:
+                    seen_places[place_id] = result
+                all_results.append(result)
+        except Exception as e:
+            logger.error("Error processing place results for %s: %s", query.query, e)
     
     state['search_results'] = all_results
     
-    state['messages'].append({
-        "role": "assistant",
-        "content": f"Great! I found {len(all_results)} places across different categories. Let me create your personalized travel plan..."
-    })
+    push_message(state, "assistant", f"Great! I found {len(all_results)} places across different categories. Let me create your personalized travel plan...")
     
-    print(f"Found {len(all_results)} total places")
+    logger.info("Found %d total places", len(all_results))
     return state
 
 def create_travel_plan_node(state: GraphState):
@@ -229,25 +334,27 @@ def create_travel_plan_node(state: GraphState):
     if 'search_results' not in state or 'user_preferences' not in state:
         return state
     
-    print("--- CREATING TRAVEL PLAN ---")
+    logger.info("--- CREATING TRAVEL PLAN ---")
     
     preferences = state['user_preferences']
     results = state['search_results']
     
-    # Group places by category
-    places_by_category = {}
+    # Group places by category, scoring each place once up front
+    scored_by_category = defaultdict(list)
     for place in results:
-        if place.category not in places_by_category:
-            places_by_category[place.category] = []
-        places_by_category[place.category].append(place)
-    
-    # Sort each category by rating and priority
-    for category in places_by_category:
-        places_by_category[category].sort(
-            key=lambda x: (x.priority * 2 + (x.rating or 0)), 
-            reverse=True
-        )
-    
+        scored_by_category[place.category].append((place.priority * 2 + (place.rating or 0.0), place))
+
+    places_by_category = {
+        category: [place for _, place in scored]
+        for category, scored in scored_by_category.items()
+    }
+
+    # Only the best few per category are rendered, so a partial sort is enough
+    top_by_category = {
+        category: [place for _, place in nlargest(TOP_PLACES_PER_CATEGORY, scored, key=itemgetter(0))]
+        for category, scored in scored_by_category.items()
+    }
+
     # Create the travel plan
     travel_plan = TravelPlan(
         destination=preferences.destination,
@@ -258,29 +365,32 @@ def create_travel_plan_node(state: GraphState):
     
     state['travel_plan'] = travel_plan
     
-    # Generate a formatted response
-    plan_text = f"# Your Personalized Travel Plan for {preferences.destination}\n\n"
-    plan_text += f"**Trip Duration:** {preferences.duration}\n"
-    plan_text += f"**Budget:** {preferences.budget}\n"
-    plan_text += f"**Traveling with:** {preferences.companions}\n\n"
+    # Generate a formatted response; fragments are collected and joined once
+    interests_text = ', '.join(preferences.interests)
+    parts = [
+        f"# Your Personalized Travel Plan for {preferences.destination}\n\n",
+        f"**Trip Duration:** {preferences.duration}\n",
+        f"**Budget:** {preferences.budget}\n",
+        f"**Traveling with:** {preferences.companions}\n\n",
+    ]
     
-    for category, places in places_by_category.items():
+    for category, places in top_by_category.items():
         if places:
-            plan_text += f"## {category}\n"
-            for i, place in enumerate(places[:3], 1):  # Top 3 per category
+            parts.append(f"## {category}\n")
+            for i, place in enumerate(places, 1):
                 rating_text = f" ({place.rating}⭐)" if place.rating else ""
-                plan_text += f"{i}. **{place.name}**{rating_text}\n"
-                plan_text += f"   📍 {place.formatted_address}\n\n"
+                parts.append(f"{i}. **{place.name}**{rating_text}\n")
+                parts.append(f"   📍 {place.formatted_address}\n\n")
     
-    plan_text += "\n💡 **Tips:**\n"
-    plan_text += f"- This plan is tailored for your {preferences.budget} budget and {', '.join(preferences.interests)} interests\n"
-    plan_text += f"- All locations are in or near {preferences.destination}\n"
-    plan_text += "- Consider checking opening hours and making reservations where needed\n"
+    parts.extend([
+        "\n💡 **Tips:**\n",
+        f"- This plan is tailored for your {preferences.budget} budget and {interests_text} interests\n",
+        f"- All locations are in or near {preferences.destination}\n",
+        "- Consider checking opening hours and making reservations where needed\n",
+    ])
+    plan_text = "".join(parts)
     
-    state['messages'].append({
-        "role": "assistant",
-        "content": plan_text
-    })
+    push_message(state, "assistant", plan_text)
     
     return state
 
@@ -289,65 +399,48 @@ def create_memory_management_tools():
     
     def update_core_memory(user_id: str, field: str, value: str):
         """Update persistent user information"""
-        namespace = (user_id, "core_memory")
-        current = store.get(namespace, "core")
-        if current:
-            current.value[field] = value
-            store.put(namespace, "core", current.value)
+        get_memory_service().add(user_id, f"{field}: {value}", metadata={"type": "core_memory", "field": field})
         return f"Updated {field} to {value}"
     
     def search_past_trips(user_id: str, query: str, limit: int = 5):
         """Search through past trip memories"""
-        namespace = (user_id, "past_trips")
-        results = store.search(namespace, query=query, limit=limit)
-        return [r.value for r in results]
+        results = get_memory_service().search_trips(user_id, query, [], limit=limit)
+        return [r["memory"] for r in results]
     
     def add_trip_memory(user_id: str, trip_data: Dict):
         """Store a completed trip for future reference"""
-        namespace = (user_id, "past_trips")
-        memory_id = f"trip_{datetime.now().timestamp()}"
-        store.put(namespace, memory_id, trip_data)
+        content = "; ".join(f"{key}: {value}" for key, value in trip_data.items())
+        get_memory_service().add(user_id, content, metadata={"type": "past_trip", "destination": trip_data.get("destination")})
         return "Trip memory saved"
     
     return [update_core_memory, search_past_trips, add_trip_memory]
 
 # Add memory retrieval node
-def memory_retrieval_node(state: GraphState, store):
+def memory_retrieval_node(state: GraphState):
     """Retrieve relevant memories before planning"""
     user_id = state.get('user_id', 'default_user')
     preferences = state['user_preferences']
-    
-    # Get core memories
-    core_namespace = (user_id, "core_memory")
-    core_memory = store.get(core_namespace, "core")
+    memory_service = get_memory_service()
     
     # Search past trips for similar destinations or interests
-    trip_namespace = (user_id, "past_trips")
-    similar_trips = store.search(
-        trip_namespace,
-        query=f"{preferences.destination} {' '.join(preferences.interests)}",
-        limit=3
-    )
+    similar_trips = memory_service.search_trips(user_id, preferences.destination, preferences.interests, limit=3)
     
     # Enrich state with memories
-    state['core_memory'] = core_memory.value if core_memory else {}
-    state['similar_past_trips'] = [t.value for t in similar_trips]
+    state['core_memory'] = memory_service.get_core_memory(user_id)
+    state['similar_past_trips'] = similar_trips
     
-    state['messages'].append({
-        "role": "assistant",
-        "content": f"I remember you've been to {len(similar_trips)} similar destinations before. Let me use that to personalize your plan!"
-    })
+    push_message(state, "assistant", f"I remember you've been to {len(similar_trips)} similar destinations before. Let me use that to personalize your plan!")
     
     return state
 
 def should_continue(state: GraphState) -> str:
     """Determine the next step in the flow."""
-    user_messages = [m for m in state['messages'] if m.get('role') == 'user']
-    if not user_messages:
+    if not state.get('message_counts', {}).get('user', 0):
         return "end"
         
     if 'user_preferences' not in state:
-        return "preferences"
+        # Extraction needs more from the user; hand control back instead of re-asking the LLM
+        return "end"
     elif 'search_queries' not in state:
         return "queries"
     elif 'search_results' not in state:
@@ -378,7 +471,6 @@ def build_travel_planner():
         "preferences",
         should_continue,
         {
-            "preferences": "preferences",
             "queries": "queries",
             "search": "search",
             "plan": "plan",
@@ -395,7 +487,23 @@ def build_travel_planner():
 # ---------------------
 # MAIN EXECUTION
 # ---------------------
+EXIT_COMMANDS = frozenset({'exit', 'quit', 'bye'})
+
+async def run_graph(graph, inputs):
+    """Stream one pass of the graph, printing assistant replies as nodes finish."""
+    try:
+        async for step in graph.astream(inputs):
+            for node_name, node_state in step.items():
+                messages = node_state.get('messages', [])
+                if messages and messages[-1].get('role') == 'assistant':
+                    sys.stdout.write(f"\n🤖 Assistant: {messages[-1]['content']}\n")
+            sys.stdout.flush()
+    finally:
+        # Each turn runs on a fresh event loop, so release this loop's MCP connections
+        await close_async_client()
+
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
     print("🌍 Welcome to your AI Travel Planner!")
     print("Make sure your MCP server is running on localhost:8000")
     print("-" * 50)
@@ -414,17 +522,14 @@ def main():
 
     # Initialize state
     inputs = {
-        'messages': []
+        'messages': [],
+        'message_counts': {}
     }
     
     while True:
         try:
-            # Run the graph
-            for step in graph.stream(inputs):
-                for node_name, node_state in step.items():
-                    messages = node_state.get('messages', [])
-                    if messages and messages[-1].get('role') == 'assistant':
-                        print(f"\n🤖 Assistant: {messages[-1]['content']}")
+            # Run the graph (the search node is async, so drive it through astream)
+            asyncio.run(run_graph(graph, inputs))
             
             # Check if we're done
             if 'travel_plan' in inputs:
@@ -434,12 +539,12 @@ def main():
             # Get user input
             user_input = input("\n👤 You: ").strip()
             
-            if user_input.lower() in ['exit', 'quit', 'bye']:
+            if user_input.lower() in EXIT_COMMANDS:
                 print("👋 Happy travels!")
                 break
             
             if user_input:
-                inputs['messages'].append({"role": "user", "content": user_input})
+                push_message(inputs, "user", user_input)
         
         except KeyboardInterrupt:
             print("\n👋 Travel planning interrupted. Goodbye!")
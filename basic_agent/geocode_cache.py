@@ -0,0 +1,13 @@
+# geocode_cache.py
+#
+# The persistent geocode cache is maintained in travel_planner/tools/geocode_cache.py and shared
+# by both agents; re-export it from there (see _shared.py for the path setup).
+
+import _shared  # noqa: F401
+
+from tools.geocode_cache import (
+    DEFAULT_GEOCODE_CACHE_PATH,
+    GEOCODE_TTL_SECONDS,
+    geocode_destination,
+    normalize_destination,
+)
@@ -0,0 +1,14 @@
+# llm_cache.py
+#
+# The semantic LLM cache is maintained in travel_planner/utils/llm_cache.py and shared by both
+# agents; re-export it from there (see _shared.py for the path setup).
+
+import _shared  # noqa: F401
+
+from utils.llm_cache import (
+    DEFAULT_CACHE_PATH,
+    QUERY_DEDUPE_THRESHOLD,
+    SemanticLLMCache,
+    cosine_similarity,
+    dedupe_queries,
+)
@@ -0,0 +1,108 @@
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from cachetools import LRUCache
+
+# Past-trip searches kept per process; least recently used entries are evicted past this
+SEARCH_CACHE_SIZE = 512
+
+
+def _mem0_config() -> Dict[str, Any]:
+    """Mem0 settings: pgvector for the ANN index, Gemini for embeddings and (unused with infer=False) extraction."""
+    return {
+        "vector_store": {
+            "provider": "pgvector",
+            "config": {
+                "connection_string": os.getenv("POSTGRES_URI"),
+                "collection_name": "travel_agent_memories",
+                "embedding_model_dims": 768,
+                "maxconn": 20,
+            },
+        },
+        "embedder": {
+            "provider": "gemini",
+            "config": {"model": "models/text-embedding-004", "api_key": os.getenv("GEMINI_API_KEY")},
+        },
+        "llm": {
+            "provider": "gemini",
+            "config": {"model": "gemini-2.5-flash-lite", "temperature": 0, "api_key": os.getenv("GEMINI_API_KEY")},
+        },
+    }
+
+
+class MemoryService:
+    """Episodic trip memory backed by Mem0 on pgvector, shared across sessions.
+
+    Search results are cached per (user_id, destination, interests, limit) so a node that is
+    re-run for the same preferences doesn't embed and query again; any write for a user
+    drops that user's cached searches.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        try:
+            from mem0 import Memory
+        except ImportError as e:
+            raise ImportError("MemoryService requires the 'mem0ai' package (and 'psycopg2' for pgvector)") from e
+
+        self._memory = Memory.from_config(config or _mem0_config())
+        self._search_cache: LRUCache = LRUCache(maxsize=SEARCH_CACHE_SIZE)
+        self._lock = threading.Lock()
+
+    def add(self, user_id: str, content: str, metadata: Optional[Dict[str, Any]] = None):
+        """Store pre-formatted content as-is; infer=False skips Mem0's fact-extraction LLM call."""
+        self._memory.add(
+            [{"role": "assistant", "content": content}],
+            user_id=user_id,
+            metadata=metadata or {},
+            infer=False,
+        )
+        with self._lock:
+            for key in [k for k in self._search_cache if k[0] == user_id]:
+                self._search_cache.pop(key, None)
+
+    def search_trips(self, user_id: str, destination: str, interests: List[str], limit: int = 3) -> List[Dict[str, Any]]:
+        """Past trips similar to the given destination and interests, most relevant first."""
+        key = (user_id, destination.strip().lower(), tuple(sorted(i.strip().lower() for i in interests or [])), limit)
+        with self._lock:
+            cached = self._search_cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = self._memory.search(
+            query=f"{destination} {' '.join(interests or [])}",
+            user_id=user_id,
+            limit=limit,
+            filters={"type": "past_trip"},
+        )
+        results = response.get("results", []) if isinstance(response, dict) else response
+        with self._lock:
+            self._search_cache[key] = results
+        return results
+
+    def get_core_memory(self, user_id: str) -> Dict[str, str]:
+        """Core facts are stored one per memory as `field: value`; later writes win."""
+        response = self._memory.get_all(user_id=user_id, filters={"type": "core_memory"})
+        records = response.get("results", []) if isinstance(response, dict) else response
+        records = sorted(records, key=lambda r: r.get("updated_at") or r.get("created_at") or "")
+
+        core_memory = {}
+        for record in records:
+            field = (record.get("metadata") or {}).get("field")
+            if field:
+                core_memory[field] = record["memory"].split(": ", 1)[-1]
+        return core_memory
+
+
+_memory_service: Optional[MemoryService] = None
+_service_lock = threading.Lock()
+
+
+def get_memory_service() -> MemoryService:
+    """Process-wide MemoryService, created on first use so the agent runs without Mem0 installed."""
+    global _memory_service
+    if _memory_service is None:
+        with _service_lock:
+            if _memory_service is None:
+                _memory_service = MemoryService()
+    return _memory_service
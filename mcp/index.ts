@@ -204,6 +204,42 @@ const SEARCH_PLACES_TOOL: Tool = {
   }
 };
 
+const SEARCH_PLACES_BATCH_TOOL: Tool = {
+  name: "maps_search_places_batch",
+  description: "Run several place searches around the same center point in one call",
+  inputSchema: {
+    type: "object",
+    properties: {
+      searches: {
+        type: "array",
+        items: {
+          type: "object",
+          properties: {
+            query: { type: "string" },
+            category: { type: "string" },
+            priority: { type: "number" }
+          },
+          required: ["query"]
+        },
+        description: "Searches to run; results are returned in the same order"
+      },
+      location: {
+        type: "object",
+        properties: {
+          latitude: { type: "number" },
+          longitude: { type: "number" }
+        },
+        description: "Optional center point shared by all searches"
+      },
+      radius: {
+        type: "number",
+        description: "Search radius in meters (max 50000)"
+      }
+    },
+    required: ["searches"]
+  }
+};
+
 const PLACE_DETAILS_TOOL: Tool = {
   name: "maps_place_details",
   description: "Get detailed information about a specific place",
@@ -296,6 +332,7 @@ const MAPS_TOOLS = [
   GEOCODE_TOOL,
   REVERSE_GEOCODE_TOOL,
   SEARCH_PLACES_TOOL,
+  SEARCH_PLACES_BATCH_TOOL,
   PLACE_DETAILS_TOOL,
   DISTANCE_MATRIX_TOOL,
   ELEVATION_TOOL,
@@ -321,15 +358,19 @@ async function handleGeocode(address: string) {
     };
   }
 
+  const result = {
+    location: data.results[0].geometry.location,
+    formatted_address: data.results[0].formatted_address,
+    place_id: data.results[0].place_id
+  };
+
   return {
     content: [{
       type: "text",
-      text: JSON.stringify({
-        location: data.results[0].geometry.location,
-        formatted_address: data.results[0].formatted_address,
-        place_id: data.results[0].place_id
-      }, null, 2)
+      text: JSON.stringify(result)
     }],
+    // Clients that understand structured results read this directly instead of re-parsing `text`
+    structuredContent: result,
     isError: false
   };
 }
@@ -394,20 +435,54 @@ async function handlePlaceSearch(
     };
   }
 
+  const result = {
+    places: data.results.map((place) => ({
+      name: place.name,
+      formatted_address: place.formatted_address,
+      location: place.geometry.location,
+      place_id: place.place_id,
+      rating: place.rating,
+      types: place.types
+    }))
+  };
+
   return {
     content: [{
       type: "text",
-      text: JSON.stringify({
-        places: data.results.map((place) => ({
-          name: place.name,
-          formatted_address: place.formatted_address,
-          location: place.geometry.location,
-          place_id: place.place_id,
-          rating: place.rating,
-          types: place.types
-        }))
-      }, null, 2)
+      text: JSON.stringify(result)
     }],
+    structuredContent: result,
+    isError: false
+  };
+}
+
+async function handlePlaceSearchBatch(
+  searches: Array<{ query: string; category?: string; priority?: number }>,
+  location?: { latitude: number; longitude: number },
+  radius?: number
+) {
+  // One failed search doesn't fail the batch; its entry carries the error instead of places
+  const responses = await Promise.all(
+    searches.map((search) => handlePlaceSearch(search.query, location, radius).catch((error) => ({
+      content: [{ type: "text", text: `Error: ${error instanceof Error ? error.message : String(error)}` }],
+      isError: true
+    })))
+  );
+
+  const result = {
+    results: responses.map((response) =>
+      response.isError
+        ? { error: response.content[0].text }
+        : { places: (response as { structuredContent: { places: unknown[] } }).structuredContent.places }
+    )
+  };
+
+  return {
+    content: [{
+      type: "text",
+      text: JSON.stringify(result)
+    }],
+    structuredContent: result,
     isError: false
   };
 }
@@ -614,6 +689,15 @@ server.setRequestHandler(CallToolRequestSchema, async (request: CallToolRequest)
         return await handlePlaceSearch(query, location, radius);
       }
 
+      case "maps_search_places_batch": {
+        const { searches, location, radius } = request.params.arguments as {
+          searches: Array<{ query: string; category?: string; priority?: number }>;
+          location?: { latitude: number; longitude: number };
+          radius?: number;
+        };
+        return await handlePlaceSearchBatch(searches, location, radius);
+      }
+
       case "maps_place_details": {
         const { place_id } = request.params.arguments as { place_id: string };
         return await handlePlaceDetails(place_id);
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 
@@ -27,8 +28,14 @@ class Settings(BaseSettings):
     VECTOR_STORE_TYPE: str = "chroma"  # chroma, pinecone, pgvector
     CHROMA_PERSIST_DIR: str = "./chroma_db"
     
+    # Logging
+    LOG_LEVEL: str = "INFO"
+
     # MCP Server
     MCP_SERVER_URL: str = "http://localhost:8000"
+    MCP_CONNECT_TIMEOUT: float = 2.0  # seconds to establish the connection
+    MCP_READ_TIMEOUT: float = 30.0  # seconds to wait for the tool's response
+    MCP_CACHE_FILE: Optional[str] = None  # JSON sidecar for geocode/search results; unset keeps them in memory only
     
     class Config:
         env_file = ".env"
@@ -1,35 +1,58 @@
 import gradio as gr
+import logging
+import time
 from graph.builder import build_travel_planner_with_memory
+from graph.state import push_user_message
 from config.settings import settings
-from memory.memgpt_system import MemGPTSystem
+from memory.memgpt_system import MemGPTPool
+from utils.helpers import EXIT_COMMANDS, MEMORY_COMMAND
 import json
 
+logging.basicConfig(level=settings.LOG_LEVEL, format="%(levelname)s %(name)s: %(message)s")
+
 # Initialize system
 graph = build_travel_planner_with_memory()
 
-# Global state dictionary (acts like 'inputs' from main.py)
-state = {
-    'messages': [],
-    'user_id': 'demo_user',
-    'memgpt_system': MemGPTSystem(user_id='demo_user'),
-}
 
-def chat_with_travel_agent(user_input, chat_history):
+def new_session_state(memgpt_system=None):
+    """Fresh per-browser-session state (acts like 'inputs' from main.py); pass memgpt_system to keep its memory."""
+    return {
+        'messages': [],
+        'user_id': 'demo_user',
+        'memgpt_system': memgpt_system or MemGPTPool.get('demo_user'),
+        'travel_plan_ready': False,
+    }
+
+# Minimum seconds between chatbot re-renders while the graph is running
+UI_UPDATE_INTERVAL = 0.05
+
+# Nodes whose LLM output is shown to the user as it is generated; other nodes' LLM calls
+# (structured extraction, MemGPT function calls) are internal
+STREAMED_NODES = frozenset({"plan"})
+
+
+def chat_with_travel_agent(user_input, chat_history, state):
+    """Streams chat history snapshots to the Chatbot, coalescing graph steps into at most one render per UI_UPDATE_INTERVAL."""
     try:
+        stripped = user_input.strip()
+        command = stripped.lower()
+
         # If the last message was from the assistant, just return and wait for user input
         if state['messages'] and state['messages'][-1].get('role') == 'assistant':
-            if not user_input.strip():
-                 return state['messages']
+            if not stripped:
+                 yield state['messages']
+                 return
 
         # Handle exit
-        if user_input.lower() in ['exit', 'quit', 'bye']:
+        if command in EXIT_COMMANDS:
             bot_msg = "👋 Happy travels! Your memories have been saved."
-            state['messages'].append({"role": "user", "content": user_input})
+            push_user_message(state, user_input)
             state['messages'].append({"role": "assistant", "content": bot_msg})
-            return state['messages']
+            yield state['messages']
+            return
         
         # Handle memory view
-        if user_input.lower() == 'memory':
+        if command == MEMORY_COMMAND:
             if state.get('memgpt_system'):
                 memgpt = state['memgpt_system']
                 
@@ -43,54 +66,88 @@ def chat_with_travel_agent(user_input, chat_history):
                 
                 # Archival Memory
                 archival_memories = memgpt.memory_store.get_all_archival_memories()
-                archival_memory_msg = "\n\n📚 **Archival Memory (Past Trips)**\n"
+                parts = ["\n\n📚 **Archival Memory (Past Trips)**\n"]
                 if archival_memories:
                     for i, mem in enumerate(archival_memories, 1):
                         content = mem.get('content', 'No content')
                         metadata = mem.get('metadata', {})
-                        archival_memory_msg += f"\n**Memory {i}**\n"
-                        archival_memory_msg += f"**Destination:** {metadata.get('destination', 'N/A')}\n"
-                        archival_memory_msg += f"**Timestamp:** {metadata.get('timestamp', 'N/A')}\n"
-                        archival_memory_msg += f"**Details:**\n{content}\n"
+                        parts.append(
+                            f"\n**Memory {i}**\n"
+                            f"**Destination:** {metadata.get('destination', 'N/A')}\n"
+                            f"**Timestamp:** {metadata.get('timestamp', 'N/A')}\n"
+                            f"**Details:**\n{content}\n"
+                        )
                 else:
-                    archival_memory_msg += "No trips saved to archival memory yet."
+                    parts.append("No trips saved to archival memory yet.")
+                archival_memory_msg = "".join(parts)
                 
                 bot_msg = core_memory_msg + archival_memory_msg
             else:
                 bot_msg = "No memory available yet!"
             
-            state['messages'].append({"role": "user", "content": user_input})
+            push_user_message(state, user_input)
             state['messages'].append({"role": "assistant", "content": bot_msg})
-            return state['messages']
+            yield state['messages']
+            return
         
-        if not user_input.strip():
-            return chat_history
+        if not stripped:
+            yield chat_history
+            return
 
         # Append user input
-        state['messages'].append({"role": "user", "content": user_input})
-
-        # Run through the travel planner graph
-        bot_msg = ""
-        for step in graph.stream(state):
-            for node_name, node_state in step.items():
-                messages = node_state.get('messages', [])
-                if messages and messages[-1].get('role') == 'assistant':
-                    bot_msg = messages[-1]['content']
-
-        # Travel plan ready check
-        if 'travel_plan' in state:
-            bot_msg += "\n\n✅ Your travel plan is ready and saved to memory!"
-
-        # Append bot message to state
-        if bot_msg and (not state['messages'] or bot_msg != state['messages'][-1].get('content')):
-             state['messages'].append({"role": "assistant", "content": bot_msg})
-
-        return state['messages']
+        push_user_message(state, user_input)
+        yield state['messages']
+
+        # Run through the travel planner graph; the reply dict is updated in place as steps arrive.
+        # "messages" mode delivers LLM tokens while a node is still running, "updates" the node's
+        # finished state, whose message then replaces the streamed text.
+        reply = {"role": "assistant", "content": ""}
+        # Built once per turn; each update below mutates `reply` in place and re-yields the same list
+        chat_history = state['messages'] + [reply]
+        streaming_id = None
+        last_emit = time.monotonic()
+        state['travel_plan_ready'] = False
+        for mode, payload in graph.stream(state, stream_mode=["updates", "messages"]):
+            if mode == "messages":
+                chunk, metadata = payload
+                if metadata.get('langgraph_node') not in STREAMED_NODES or not isinstance(chunk.content, str):
+                    continue
+                if chunk.id != streaming_id:
+                    streaming_id = chunk.id
+                    reply['content'] = ""
+                reply['content'] += chunk.content
+            else:
+                for node_name, node_state in payload.items():
+                    if node_state.get('travel_plan_ready'):
+                        state['travel_plan_ready'] = True
+                    if new_message := node_state.get('new_assistant_message'):
+                        reply['content'] = new_message
+                    # Keep the rendered history so the next turn only formats new messages
+                    if node_state.get('conversation_len'):
+                        state['conversation_text'] = node_state['conversation_text']
+                        state['conversation_len'] = node_state['conversation_len']
+                        state['conversation_offsets'] = node_state['conversation_offsets']
+            if time.monotonic() - last_emit > UI_UPDATE_INTERVAL:
+                last_emit = time.monotonic()
+                yield chat_history
+
+        bot_msg = reply['content']
+        ready_note = "\n\n✅ Your travel plan is ready and saved to memory!" if state['travel_plan_ready'] else ""
+
+        # Nodes append to the same messages list the graph was given, so the reply is usually
+        # already in the history; only add it if it isn't, and put the note on that one message
+        last = state['messages'][-1] if state['messages'] else None
+        if last and last.get('role') == 'assistant' and last.get('content') == bot_msg:
+            last['content'] = bot_msg + ready_note
+        elif bot_msg:
+            state['messages'].append({"role": "assistant", "content": bot_msg + ready_note})
+
+        yield state['messages']
 
     except Exception as e:
         bot_msg = f"❌ Error: {e}"
         state['messages'].append({"role": "assistant", "content": bot_msg})
-        return state['messages']
+        yield state['messages']
 
 
 # Gradio UI
@@ -103,18 +160,17 @@ with gr.Blocks(theme="soft") as demo:
     send_btn = gr.Button("Send")
     clear_btn = gr.Button("Clear Chat")
 
-    def reset_chat():
-        state['messages'] = []
-        state['user_preferences'] = None
-        state['search_queries'] = None
-        state['search_results'] = None
-        state['travel_plan'] = None
-        return []
+    # Each browser session gets its own state, created on page load
+    session_state = gr.State(new_session_state)
+
+    def reset_chat(state):
+        # Swap in a fresh state instead of clearing the old one, which a running turn may still hold
+        return new_session_state(state.get('memgpt_system')), []
 
-    send_btn.click(chat_with_travel_agent, [user_input, chatbot], chatbot).then(
+    send_btn.click(chat_with_travel_agent, [user_input, chatbot, session_state], chatbot).then(
         lambda: "", outputs=user_input
     )
-    clear_btn.click(reset_chat, outputs=chatbot)
+    clear_btn.click(reset_chat, session_state, [session_state, chatbot])
 
 # Run app
 if __name__ == "__main__":
@@ -1,3 +1,5 @@
+from types import MappingProxyType
+
 from langgraph.graph import StateGraph, END
 
 from graph.state import GraphState
@@ -11,6 +13,16 @@ from graph.nodes import (
 from graph.edges import should_continue
 
 
+# Routes out of the profiling node, shared read-only by every compiled graph
+PREFERENCES_EDGE_MAP = MappingProxyType({
+    "preferences": END,            # Wait for the next user message to continue building the profile
+    "queries": "queries",          # Proceed to planning
+    "search": "search",            # Queries came with the extracted preferences
+    "plan": "plan",
+    "end": END                     # End if something goes wrong
+})
+
+
 def build_travel_planner_with_memory():
     """Builds the conversational travel planning graph."""
     graph_builder = StateGraph(GraphState)
@@ -26,15 +38,9 @@ def build_travel_planner_with_memory():
     graph_builder.set_entry_point("preferences")
     
     # Define the main conversational loop for profiling
-    graph_builder.add_conditional_edges(
-        "preferences",
-        should_continue,
-        {
-            "preferences": "preferences",  # Loop to continue building the profile
-            "queries": "queries",          # Proceed to planning
-            "end": END                     # End if something goes wrong
-        }
-    )
+    # LangGraph only treats an actual dict as a route map (other mappings are read as a list of
+    # node names), so hand it a copy of the shared one
+    graph_builder.add_conditional_edges("preferences", should_continue, dict(PREFERENCES_EDGE_MAP))
     
     # Linear flow for the rest of the planning process
     graph_builder.add_edge("queries", "search")
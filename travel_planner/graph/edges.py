@@ -1,8 +1,14 @@
+from typing import Optional
+
 from graph.state import GraphState
+from models.preferences import PreferencesModel
+
+# Kept fully annotated and free of dynamic attribute lookups so the module stays
+# compilable with mypyc (`mypyc graph/edges.py`); the pure-Python module is what runs by default.
 
 def should_continue(state: GraphState) -> str:
     """Determines the next step based on whether the profile is complete."""
-    preferences = state.get('user_preferences')
+    preferences: Optional[PreferencesModel] = state.get('user_preferences')
     
     if preferences and preferences.ready_to_plan:
         # Profile is complete and user wants to plan a trip
@@ -14,5 +20,5 @@ def should_continue(state: GraphState) -> str:
             return "plan"
         return "end"
     
-    # If not ready to plan, loop back to the profiling node
+    # Not ready to plan yet; the graph ends the turn and re-enters the profiling node on the next message
     return "preferences"
@@ -1,16 +1,62 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-from tools.mcp_client import MCPClient
-from config.settings import settings
-from graph.state import GraphState
-from models.preferences import PreferencesModel, SearchQueries
-from memory.memgpt_system import MemGPTSystem
+from tools.mcp_client import MCPBatchNotSupported, MCPBatchToolUnavailable, close_async_client, get_mcp
+from tools.geocode_cache import geocode_destination
+from graph.state import GraphState, conversation_text, push_assistant_message
+from models.preferences import PlanBootstrap, PreferencesModel, SearchQuery, SearchQueries
+from memory.memgpt_system import MemGPTSystem, MemGPTPool
 from models.places import PlaceResult, TravelPlan
-from utils.helpers import _parse_duration_to_days, _cluster_places_by_distance, _basic_travel_plan, _generate_basic_narrative
+from utils.llm import get_llm, get_structured
+from utils.llm_cache import SemanticLLMCache, dedupe_queries
+from utils.prompts import PLAN_BOOTSTRAP_INSTRUCTIONS, SEARCH_QUERY_INSTRUCTIONS
+from utils.helpers import CHAT_COMMANDS, _parse_duration_to_days, _cluster_places_by_distance, _generate_basic_narrative
+
+import asyncio
+import datetime
+import hashlib
+import logging
+import re
+from itertools import groupby, islice
+from operator import attrgetter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Cleared once the MCP server turns out not to have the batched search tool, so later plans go straight to single calls
+_mcp_batch_supported = True
+
+
+# Phrases from the profiling questions, mapped to the preference the user's reply answers;
+# matched in one pass over the last assistant message
+PROFILE_QUESTIONS = {
+    "what kind of budget": "budget",
+    "who do you usually travel with": "companions",
+    "top interests": "interests",
+}
+_PROFILE_QUESTION_RE = re.compile("|".join(map(re.escape, PROFILE_QUESTIONS)), re.IGNORECASE)
+
+# Phrase in the assistant's "ready to plan a trip?" prompts; while it's the last thing asked,
+# replies without a destination get a conversational nudge
+READY_TO_PLAN = "ready to plan"
+
 
-import os, datetime, json
+# Placeholder values the extraction LLM returns when no destination was actually given
+INVALID_DESTINATIONS = frozenset({"none", "unknown", "not specified", "n/a", ""})
 
 
+def _is_valid_destination(destination: Optional[str]) -> bool:
+    return destination is not None and destination.strip().lower() not in INVALID_DESTINATIONS
+
+
+# Structured Gemini responses shared across turns and sessions, scoped per user. Extractions are
+# only reused on an exact key: similar prompts ("Paris for 3 days" vs "Paris for 5 days") differ
+# in exactly the slots being extracted
+plan_bootstrap_cache = SemanticLLMCache(PlanBootstrap, namespace="plan_bootstrap", ttl_seconds=60 * 60)
+search_queries_cache = SemanticLLMCache(SearchQueries, namespace="search_queries", ttl_seconds=24 * 60 * 60)
+
+# Most recent messages included verbatim in the extraction prompt
+CONVERSATION_WINDOW = 12
+
 def _update_memory_with_preferences(memgpt: MemGPTSystem, preferences: PreferencesModel):
     """Helper to update core memory with validated preferences."""
     if not preferences:
@@ -34,11 +80,134 @@ def _update_memory_with_preferences(memgpt: MemGPTSystem, preferences: Preferenc
     update_message = f"SYSTEM: Update the user profile with these facts: {summary}"
     
     try:
-        print(f"🧠 Updating core memory with summary: {summary}")
-        memgpt.process_message(update_message)
-        print("✅ Core memory updated.")
+        logger.info("Updating core memory with summary: %s", summary)
+        # The facts are already structured, so write them straight to core memory without an LLM hop
+        memgpt.process_message(update_message, infer=False, prefacts=profile_facts)
+        logger.info("Core memory updated.")
+    except Exception as e:
+        logger.warning("Failed to update core memory: %s", e)
+
+
+# (query, page_size, metadata type to restrict to or None for all archival entries,
+#  keyword to fuse with the vector ranking or None for a pure vector search)
+ArchivalSearch = Tuple[str, int, Optional[str], Optional[str]]
+
+
+def _search_archival_batch(state: GraphState, memgpt: MemGPTSystem, searches: List[ArchivalSearch]) -> List[List[Dict]]:
+    """Archival searches for ArchivalSearch tuples, memoized for the current user turn.
+
+    Nodes that run in the same turn often issue the same archival query; the cache is
+    dropped whenever a new user message arrives or the archive is written to. Misses are
+    sent to the store as one batched search.
+    """
+    turn = state.get('user_msg_count', 0)
+    cache = state.get('archival_cache')
+    if cache is None or state.get('archival_cache_turn') != turn:
+        cache = state['archival_cache'] = {}
+        state['archival_cache_turn'] = turn
+
+    misses = list(dict.fromkeys(key for key in searches if key not in cache))
+    if misses:
+        results = memgpt.memory_store.search_archival_batch(
+            [q for q, _, _, _ in misses],
+            [k for _, k, _, _ in misses],
+            [{"type": t} if t else None for _, _, t, _ in misses],
+            [kw for _, _, _, kw in misses]
+        )
+        cache.update(zip(misses, results))
+    return [cache[key] for key in searches]
+
+
+def _search_archival(state: GraphState, memgpt: MemGPTSystem, query: str, page_size: int,
+                     entry_type: Optional[str] = None, keyword: Optional[str] = None) -> List[Dict]:
+    return _search_archival_batch(state, memgpt, [(query, page_size, entry_type, keyword)])[0]
+
+
+def _past_trips_search(preferences: PreferencesModel) -> ArchivalSearch:
+    # Only the one-summary-per-trip entries, not every fact MemGPT has archived; trips that name
+    # the destination outright are fused in even when the embedding ranks them low
+    return preferences.search_key, 3, "trip_plan", preferences.destination
+
+
+def _past_insights_search(preferences: PreferencesModel) -> ArchivalSearch:
+    return f"{preferences.search_key} preferences", 2, None, None
+
+
+def _build_trip_pack(trips: List[Dict], k: int = 3) -> Tuple[str, str]:
+    """Render the k most relevant past trips as a compact, deterministic prompt section and its short content hash.
+
+    The chosen trips are ordered by id rather than by relevance, so the same trips always render to the
+    same text and the prompt prefix stays cacheable.
+    """
+    text = _render_memories(sorted(trips[:k], key=lambda t: t.get('id', '')))
+    return text, hashlib.md5(text.encode()).hexdigest()[:8]
+
+
+# Longest memory summary rendered into a prompt; archived trip plans can run to several paragraphs
+MEMORY_SUMMARY_CHARS = 200
+
+
+def _render_memories(memories: List[Dict]) -> str:
+    """One `- destination: summary` line per archival memory, with each summary capped at MEMORY_SUMMARY_CHARS."""
+    lines = []
+    for memory in memories:
+        destination = (memory.get('metadata') or {}).get('destination', 'Unknown')
+        summary = "; ".join(
+            line.strip() for line in memory.get('content', '').splitlines()
+            if line.strip() and not line.startswith("Destination:")
+        )
+        lines.append(f"- {destination}: {summary[:MEMORY_SUMMARY_CHARS]}")
+    return "\n".join(lines)
+
+
+def _past_trip_pack(state: GraphState, memgpt: MemGPTSystem, preferences: PreferencesModel) -> Tuple[str, str]:
+    """The trip pack for past trips similar to `preferences`, or ("", "") when there are none."""
+    try:
+        # The plan node's insight search is fetched in the same batch and served from the turn cache
+        past_trips, _ = _search_archival_batch(
+            state, memgpt, [_past_trips_search(preferences), _past_insights_search(preferences)]
+        )
     except Exception as e:
-        print(f"⚠️ Failed to update core memory: {e}")
+        logger.warning("Could not search past trips: %s", e)
+        return "", ""
+    if not past_trips:
+        return "", ""
+    trip_pack, trip_pack_version = _build_trip_pack(past_trips)
+    logger.info("Using past-trip memory pack %s (%d trips)", trip_pack_version, min(len(past_trips), 3))
+    return trip_pack, trip_pack_version
+
+
+def _place_scores(places: List[PlaceResult]) -> np.ndarray:
+    """priority * 2 + rating for every place, scored as whole columns rather than place by place."""
+    priorities = np.fromiter((p.priority for p in places), dtype=np.float32, count=len(places))
+    ratings = np.fromiter((p.rating or 0 for p in places), dtype=np.float32, count=len(places))
+    return priorities * 2 + ratings
+
+
+def _rank(scores: np.ndarray, indices: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """`indices` best-first by score, ties in their original order; with `k`, only the top k (picked in O(n))."""
+    if k is not None and k < len(indices):
+        indices = indices[np.argpartition(-scores[indices], k - 1)[:k]]
+    return indices[np.lexsort((indices, -scores[indices]))]
+
+
+def _top_places(places: List[PlaceResult], k: int) -> List[PlaceResult]:
+    return [places[i] for i in _rank(_place_scores(places), np.arange(len(places)), k)]
+
+
+def _group_places_by_category(places: List[PlaceResult], limit: Optional[int] = None) -> Dict[str, List[PlaceResult]]:
+    """Group places by category, each group best-first by priority and rating (and cut to `limit`)."""
+    # Categories are numbered in first-seen order, which the returned dict keeps
+    category_ids = {}
+    codes = np.fromiter(
+        (category_ids.setdefault(p.category, len(category_ids)) for p in places), dtype=np.intp, count=len(places)
+    )
+    # One sort by (category, best score first, original order) leaves each category a contiguous run
+    order = np.lexsort((np.arange(len(places)), -_place_scores(places), codes))
+    return {
+        category: list(islice(group, limit))
+        for category, group in groupby((places[i] for i in order), key=attrgetter('category'))
+    }
 
 
 def user_profiling_node(state: GraphState) -> GraphState:
@@ -46,97 +215,144 @@ def user_profiling_node(state: GraphState) -> GraphState:
     
     # Initialize memory and preferences if they don't exist
     if 'memgpt_system' not in state or state['memgpt_system'] is None:
-        state['memgpt_system'] = MemGPTSystem(state.get('user_id', 'default_user'))
+        state['memgpt_system'] = MemGPTPool.get(state.get('user_id', 'default_user'))
     if 'user_preferences' not in state or state['user_preferences'] is None:
         state['user_preferences'] = PreferencesModel()
 
     memgpt = state['memgpt_system']
     preferences = state['user_preferences']
     messages = state.get('messages', [])
-    user_messages = [m for m in messages if m.get('role') == 'user']
     
     # If there are no user messages, greet and ask the first question.
-    if not user_messages:
+    if not state.get('user_msg_count'):
         greeting = """Hi! I'm your AI travel planner. To give you the best recommendations, I'd like to learn a bit about your travel style first.
 
 What kind of budget do you usually travel with (e.g., budget-friendly, mid-range, or luxury)?"""
-        state['messages'].append({"role": "assistant", "content": greeting})
+        push_assistant_message(state, greeting)
+        return state
+
+    # Nothing new since the last pass (e.g. the graph re-entered without a user turn)
+    if state['user_msg_count'] <= state.get('processed_message_count', 0):
         return state
 
-    latest_user_message = user_messages[-1]['content']
+    latest_user_message = state['latest_user_message']
     last_assistant_message = next((m['content'] for m in reversed(messages) if m.get('role') == 'assistant'), "")
     
+    # Determine which profile question, if any, the latest message answers
+    question = _PROFILE_QUESTION_RE.search(last_assistant_message)
+    answered = PROFILE_QUESTIONS[question.group(0).lower()] if question else None
+
     # Process the latest message through MemGPT to update its internal state/memory
-    if state.get('last_processed_message') != latest_user_message:
-        if not latest_user_message.startswith("SYSTEM:"):
-            memgpt.process_message(latest_user_message)
-        state['last_processed_message'] = latest_user_message
+    # Commands are handled by the front end, so skip the embed-and-store round trip for them
+    if not latest_user_message.startswith("SYSTEM:") and latest_user_message.strip().lower() not in CHAT_COMMANDS:
+        # Profile answers are extracted below and saved as structured facts, so MemGPT only records them
+        memgpt.process_message(latest_user_message, infer=answered is None)
+    state['processed_message_count'] = state['user_msg_count']
 
     # --- Profile Building Conversation ---
-    # Determine which question was asked last and process the answer.
-    if "what kind of budget" in last_assistant_message.lower():
+
+    if answered == "budget":
         preferences.budget = latest_user_message
-        state['messages'].append({"role": "assistant", "content": "Got it. And who do you usually travel with (e.g., solo, family, friends)?"})
+        push_assistant_message(state, "Got it. And who do you usually travel with (e.g., solo, family, friends)?")
         state['user_preferences'] = preferences
         return state
 
-    if "who do you usually travel with" in last_assistant_message.lower():
+    if answered == "companions":
         preferences.companions = latest_user_message
-        state['messages'].append({"role": "assistant", "content": "Great. What are some of your top interests when you travel (e.g., food, history, hiking)?"})
+        push_assistant_message(state, "Great. What are some of your top interests when you travel (e.g., food, history, hiking)?")
         state['user_preferences'] = preferences
         return state
 
-    if "top interests" in last_assistant_message.lower():
+    if answered == "interests":
         preferences.interests = [i.strip() for i in latest_user_message.split(',')]
         _update_memory_with_preferences(memgpt, preferences)
         prompt = """Thanks, that gives me a great starting point for your profile!
 
 I've saved these general preferences. Now, are you ready to plan a specific trip? If so, just tell me the destination and duration!"""
-        state['messages'].append({"role": "assistant", "content": prompt})
+        push_assistant_message(state, prompt)
         state['user_preferences'] = preferences
         return state
 
     # --- Trip-Specific Preference Extraction ---
-    llm = ChatGoogleGenerativeAI(model=settings.LLM_MODEL, temperature=0, api_key=settings.GEMINI_API_KEY)
-    structured_llm = llm.with_structured_output(PreferencesModel)
+    # One call extracts the trip and, once it's fully specified, its search queries too
+    structured_llm = get_structured(0, PlanBootstrap)
     
-    conversation_text = "\n".join([f"{m.get('role', 'unknown')}: {m.get('content', '')}" for m in messages])
     core_context = f"User Profile: {memgpt.working_context.user_profile}"
-    
-    extraction_prompt = f"""From the latest user message, extract the destination and duration for a specific trip.
-Do not guess or assume values. The user must explicitly state they are ready to plan a trip.
-
-Context from memory:
+    # Once the destination is known (we're only missing the duration), past trips there can
+    # inform the queries the same call generates, as they do in the queries node
+    trip_pack, trip_pack_version = "", ""
+    if _is_valid_destination(preferences.destination):
+        trip_pack, trip_pack_version = _past_trip_pack(state, memgpt, preferences)
+    # Only recent turns go in verbatim; anything MemGPT has evicted is covered by its summary
+    history = conversation_text(state, window=CONVERSATION_WINDOW)
+    if memgpt.queue_summary and len(messages) > CONVERSATION_WINDOW:
+        history = f"(Summary of earlier conversation: {memgpt.queue_summary})\n{history}"
+    
+    extraction_prompt = [
+        {"role": "system", "content": PLAN_BOOTSTRAP_INSTRUCTIONS},
+        {"role": "user", "content": f"""Context from memory:
 {core_context}
 
+Relevant past trips:
+{trip_pack or "None"}
+
+Known preferences:
+- Destination: {preferences.destination if _is_valid_destination(preferences.destination) else "Not given yet"}
+- Duration: {preferences.duration or "Not given yet"}
+- Budget: {preferences.budget}
+- Companions: {preferences.companions}
+- Interests: {', '.join(preferences.interests or [])}
+
 Conversation History:
-{conversation_text}
+{history}
 
 Latest User Message: "{latest_user_message}"
-"""
+"""},
+    ]
     
     try:
-        extracted_prefs = structured_llm.invoke(extraction_prompt)
+        bootstrap = plan_bootstrap_cache.invoke(
+            structured_llm,
+            extraction_prompt,
+            user_id=state.get('user_id', 'default_user'),
+            cache_key={
+                "latest_message": " ".join(latest_user_message.lower().split()),
+                "preferences": preferences.model_dump(exclude={"ready_to_plan"}),
+                "user_profile": memgpt.working_context.user_profile,
+                "past_trips": trip_pack_version,
+            }
+        )
+        extracted_prefs = bootstrap.preferences if bootstrap else None
+        # The extraction only covers the latest message, so a reply like "5 days" is merged over the
+        # destination given earlier rather than replacing it
+        merged = preferences
+        if extracted_prefs:
+            update_data = extracted_prefs.model_dump(exclude_unset=True, exclude_none=True, exclude={"ready_to_plan"})
+            if not _is_valid_destination(update_data.get("destination")):
+                update_data.pop("destination", None)
+            merged = preferences.model_copy(update=update_data)
         
-        if extracted_prefs and extracted_prefs.destination:
-            update_data = extracted_prefs.dict(exclude_unset=True)
-            preferences = preferences.copy(update=update_data)
+        if _is_valid_destination(merged.destination) and merged.duration:
+            preferences = merged
             preferences.ready_to_plan = True
             state['user_preferences'] = preferences
-            print(f"✅ Destination found: {preferences.destination}. Ready to plan.")
-            state['messages'].append({"role": "assistant", "content": f"Perfect! Planning a trip to {preferences.destination} for {preferences.duration}. Let me start by finding some great options for you."})
-        elif extracted_prefs and extracted_prefs.destination:
-            # If we have a destination but no duration, ask for it.
-            preferences.destination = extracted_prefs.destination
+            # With queries in hand the graph goes straight to searching and skips the queries node
+            state['search_queries'] = bootstrap.queries or None
+            logger.info("Destination found: %s. Ready to plan (%d queries generated).", preferences.destination, len(bootstrap.queries))
+            push_assistant_message(state, f"Perfect! Planning a trip to {preferences.destination} for {preferences.duration}. Let me start by finding some great options for you.")
+        elif _is_valid_destination(merged.destination):
+            # A valid destination but no duration yet; ask for it. Placeholder destinations
+            # ("unknown", "n/a") fall through to the conversational reply below.
+            preferences = merged
             state['user_preferences'] = preferences
-            state['messages'].append({"role": "assistant", "content": f"Sounds great! How long will your trip to {preferences.destination} be?"})
+            push_assistant_message(state, f"Sounds great! How long will your trip to {preferences.destination} be?")
         else:
-            if "ready to plan" in last_assistant_message:
+            if READY_TO_PLAN in last_assistant_message:
                  response = memgpt.process_message(f"The user said: '{latest_user_message}'. Respond conversationally, reminding them you're ready to plan a trip when they are.")
-                 state['messages'].append({"role": "assistant", "content": response['response']})
+                 push_assistant_message(state, response['response'])
 
     except Exception as e:
-        print(f"⚠️ Could not extract trip-specific preferences yet: {e}")
+        logger.warning("Could not extract trip-specific preferences yet: %s", e)
 
     return state
 
@@ -148,47 +364,36 @@ def memory_enhanced_planning_node(state: GraphState) -> GraphState:
     
     # Validate we have what we need
     if not preferences:
-        print("❌ No preferences found, cannot generate queries")
+        logger.warning("No preferences found, cannot generate queries")
         return state
     
-    if not hasattr(preferences, 'destination') or not preferences.destination:
-        print("❌ No destination in preferences, cannot generate queries")
+    if not _is_valid_destination(preferences.destination):
+        logger.warning("No destination in preferences, cannot generate queries")
         return state
     
     if not memgpt_system:
-        print("⚠️ No MemGPT system found, proceeding without memory context")
+        logger.warning("No MemGPT system found, proceeding without memory context")
         memgpt = None
     else:
         memgpt = memgpt_system
     
-    print(f"--- GENERATING SEARCH QUERIES for {preferences.destination} ---")
+    logger.info("--- GENERATING SEARCH QUERIES for %s ---", preferences.destination)
     
     # Search for similar past trips if MemGPT available
-    context_str = ""
-    if memgpt:
-        try:
-            interests_query = ' '.join(preferences.interests) if preferences.interests else ''
-            past_trips_query = f"{preferences.destination} {interests_query}"
-            past_trips = memgpt.memory_store.search_archival(past_trips_query, page_size=3)
-            
-            if past_trips:
-                context_str = f"\n\nRelevant past trips:\n{json.dumps(past_trips, indent=2)}"
-        except Exception as e:
-            print(f"⚠️ Could not search past trips: {e}")
+    trip_pack, trip_pack_version = _past_trip_pack(state, memgpt, preferences) if memgpt else ("", "")
     
     # Generate queries with memory context
-    llm = ChatGoogleGenerativeAI(
-        model=settings.LLM_MODEL,
-        temperature=0.3,
-        api_key=settings.GEMINI_API_KEY
-    )
-    
-    structured_llm = llm.with_structured_output(SearchQueries)
+    structured_llm = get_structured(0.3, SearchQueries)
 
     user_profile = memgpt.working_context.user_profile if memgpt else "No previous history"
     
-    query_prompt = f"""Create 6-8 strategic Google Maps search queries for {preferences.destination}.
-    
+    query_prompt = [
+        {"role": "system", "content": SEARCH_QUERY_INSTRUCTIONS},
+        {"role": "user", "content": f"""Relevant past trips:
+{trip_pack or "None"}
+
+Destination: {preferences.destination}
+
 Current trip preferences:
 - Duration: {preferences.duration}
 - Budget: {preferences.budget}
@@ -198,124 +403,141 @@ Current trip preferences:
 
 User context from memory:
 {user_profile}
-{context_str}
-
-Generate diverse queries covering:
-- Top attractions matching their interests
-- Restaurants fitting their budget
-- Activities suitable for their companions
-- Must-see items they mentioned
-
-Make queries specific to the destination and prioritize based on their stated interests.
-
-Return a JSON object with a "queries" field containing an array of objects.
-Each query object should have:
-- category: string (e.g., "Restaurants", "Attractions", "Activities")
-- query: string (the search query for Google Maps)
-- priority: integer (1-5, where 5 is most important)"""
+"""},
+    ]
     
     try:
-        search_queries_wrapper = structured_llm.invoke(query_prompt)
+        # Query generation runs at temperature 0.3, so key the cache on the prompt's inputs
+        # rather than on free-form prompt similarity
+        search_queries_wrapper = search_queries_cache.invoke(
+            structured_llm,
+            query_prompt,
+            user_id=state.get('user_id', 'default_user'),
+            cache_key={
+                "preferences": preferences.model_dump(exclude={"ready_to_plan"}),
+                "user_profile": user_profile,
+                "past_trips": trip_pack_version,
+            }
+        )
         search_queries = search_queries_wrapper.queries
         
         if search_queries and len(search_queries) > 0:
             state['search_queries'] = search_queries
-            print(f"✅ Generated {len(search_queries)} search queries")
+            logger.info("Generated %d search queries", len(search_queries))
             
-            state['messages'].append({
-                "role": "assistant",
-                "content": f"I've created {len(search_queries)} targeted searches to find the best spots for you. Let me search for places now..."
-            })
+            push_assistant_message(state, f"I've created {len(search_queries)} targeted searches to find the best spots for you. Let me search for places now...")
         else:
-            print("❌ No search queries generated")
-            state['messages'].append({
-                "role": "assistant",
-                "content": "I had trouble creating search queries. Could you provide more details about what you'd like to do?"
-            })
+            logger.warning("No search queries generated")
+            push_assistant_message(state, "I had trouble creating search queries. Could you provide more details about what you'd like to do?")
     except Exception as e:
-        print(f"❌ Error generating search queries: {e}")
-        import traceback
-        traceback.print_exc()
-        state['messages'].append({
-            "role": "assistant",
-            "content": "I encountered an error while planning. Let me try a different approach."
-        })
+        logger.exception("Error generating search queries: %s", e)
+        push_assistant_message(state, "I encountered an error while planning. Let me try a different approach.")
     
     return state
 
 
+async def _run_searches(destination: str, queries: List[SearchQuery]) -> List[List[Dict] | BaseException]:
+    """Geocode the destination, then run every search in one batch (or concurrently); results line up with `queries`."""
+    mcp_client = get_mcp()
+    try:
+        # First, geocode the destination to get coordinates for location-based searches; repeat
+        # destinations are served from the persistent geocode cache without an MCP call
+        try:
+            destination_coords = await asyncio.to_thread(geocode_destination, destination)
+        except Exception as e:
+            logger.warning("Could not geocode destination: %s", e)
+            destination_coords = None
+
+        location = destination_coords if destination_coords else None
+        radius = 10000  # 10km radius
+
+        # Preferred path: every search in one maps_search_places_batch call
+        global _mcp_batch_supported
+        if _mcp_batch_supported:
+            try:
+                return await mcp_client.asearch_places_batch([q.query for q in queries], location=location, radius=radius)
+            except MCPBatchToolUnavailable as e:
+                logger.warning("Batched search unavailable, using concurrent calls from now on: %s", e)
+                _mcp_batch_supported = False
+            except MCPBatchNotSupported as e:
+                logger.warning("Batched search failed, falling back to concurrent calls for this plan: %s", e)
+
+        async def search(query: SearchQuery) -> List[Dict]:
+            logger.debug("Searching: %s (Priority: %s)", query.query, query.priority)
+            return await mcp_client.asearch_places(query.query, location=location, radius=radius)
+
+        # Total latency is the slowest search rather than the sum of all of them
+        return await asyncio.gather(*(search(q) for q in queries), return_exceptions=True)
+    finally:
+        # The pooled AsyncClient belongs to this loop, which asyncio.run closes on return
+        await close_async_client()
+
+
 def execute_searches_node(state: GraphState):
     """Execute the search queries using the MCP server."""
     queries = state.get('search_queries')
     preferences = state.get('user_preferences')
     
     if not queries or len(queries) == 0:
-        print("❌ No search queries to execute")
+        logger.warning("No search queries to execute")
         return state
         
     if not preferences:
-        print("❌ No preferences available")
+        logger.warning("No preferences available")
         return state
     
-    print("--- EXECUTING SEARCHES ---")
+    logger.info("--- EXECUTING SEARCHES ---")
+
+    unique_queries = dedupe_queries(queries, search_queries_cache)
+    if len(unique_queries) < len(queries):
+        logger.info("Dropped %d duplicate search queries", len(queries) - len(unique_queries))
+    queries = unique_queries
     
-    mcp_client = MCPClient()
     all_results = []
-    
-    # First, geocode the destination to get coordinates for location-based searches
-    try:
-        destination_coords = mcp_client.geocode(preferences.destination)
-    except Exception as e:
-        print(f"⚠️ Could not geocode destination: {e}")
-        destination_coords = None
-    
-    for query in queries:
+    seen_places: Dict[str, PlaceResult] = {}  # place_id -> its entry in all_results
+    # Queries run highest priority first, so a place found twice keeps its higher-priority entry
+    for query, places in zip(queries, asyncio.run(_run_searches(preferences.destination, queries))):
+        if isinstance(places, Exception):
+            logger.error("Error searching for %s: %s", query.query, places)
+            continue
+
+        # Convert to our PlaceResult model. The dicts come straight from our own MCP server,
+        # so skip pydantic validation for these internal objects (top 5 results per query)
         try:
-            print(f"Searching: {query.query} (Priority: {query.priority})")
-            
-            # Search for places
-            places = mcp_client.search_places(
-                query.query, 
-                location=destination_coords if destination_coords else None,
-                radius=10000  # 10km radius
-            )
-            
-            # Convert to our PlaceResult model
-            for place in places[:5]:  # Limit to top 5 results per query
-                try:
-                    place_result = PlaceResult(
-                        name=place.get('name', ''),
-                        formatted_address=place.get('formatted_address', ''),
-                        location=place.get('location', {}),
-                        place_id=place.get('place_id', ''),
-                        rating=place.get('rating'),
-                        types=place.get('types', []),
-                        category=query.category,
-                        priority=query.priority
-                    )
-                    all_results.append(place_result)
-                except Exception as e:
-                    print(f"⚠️ Error processing place result: {e}")
+            for place in places[:5]:
+                place_id = place.get('place_id', '')
+                if place_id in seen_places:
+                    # Overlapping queries found the same place; keep one entry and record the category
+                    categories = seen_places[place_id].categories
+                    if query.category not in categories:
+                        categories.append(query.category)
                     continue
+                result = PlaceResult.model_construct(
+                    name=place.get('name', ''),
+                    formatted_address=place.get('formatted_address', ''),
+                    location=place.get('location') or {},
+                    place_id=place_id,
+                    rating=place.get('rating'),
+                    types=place.get('types') or [],
+                    category=query.category,
+                    categories=[query.category],
+                    priority=query.priority
+                )
+                if place_id:
+                    seen_places[place_id] = result
+                all_results.append(result)
         except Exception as e:
-            print(f"⚠️ Error searching for {query.query}: {e}")
-            continue
+            logger.error("Error processing place results for %s: %s", query.query, e)
     
     if len(all_results) > 0:
         state['search_results'] = all_results
         
-        state['messages'].append({
-            "role": "assistant",
-            "content": f"Great! I found {len(all_results)} places across different categories. Let me create your personalized travel plan..."
-        })
+        push_assistant_message(state, f"Great! I found {len(all_results)} places across different categories. Let me create your personalized travel plan...")
         
-        print(f"✅ Found {len(all_results)} total places")
+        logger.info("Found %d total places", len(all_results))
     else:
-        print("❌ No search results found")
-        state['messages'].append({
-            "role": "assistant",
-            "content": "I couldn't find any places matching your criteria. Could you provide more details or try a different destination?"
-        })
+        logger.warning("No search results found")
+        push_assistant_message(state, "I couldn't find any places matching your criteria. Could you provide more details or try a different destination?")
     
     return state
 
@@ -326,28 +548,17 @@ def basic_travel_plan_node(state: GraphState):
     preferences = state.get('user_preferences')
     
     if not results or len(results) == 0:
-        print("❌ No search results to create plan from")
+        logger.warning("No search results to create plan from")
         return state
         
     if not preferences:
-        print("❌ No preferences available")
+        logger.warning("No preferences available")
         return state
     
-    print("--- CREATING TRAVEL PLAN ---")
-    
-    # Group places by category
-    places_by_category = {}
-    for place in results:
-        if place.category not in places_by_category:
-            places_by_category[place.category] = []
-        places_by_category[place.category].append(place)
+    logger.info("--- CREATING TRAVEL PLAN ---")
     
-    # Sort each category by rating and priority
-    for category in places_by_category:
-        places_by_category[category].sort(
-            key=lambda x: (x.priority * 2 + (x.rating or 0)), 
-            reverse=True
-        )
+    # Group places by category, sorted by rating and priority
+    places_by_category = _group_places_by_category(results)
     
     # Create the travel plan
     travel_plan = TravelPlan(
@@ -359,34 +570,84 @@ def basic_travel_plan_node(state: GraphState):
     
     state['travel_plan'] = travel_plan
     
-    # Generate a formatted response
-    plan_text = f"# Your Personalized Travel Plan for {preferences.destination}\n\n"
-    plan_text += f"**Trip Duration:** {preferences.duration}\n"
-    plan_text += f"**Budget:** {preferences.budget}\n"
-    plan_text += f"**Traveling with:** {preferences.companions}\n\n"
+    # Generate a formatted response; fragments are collected and joined once
+    parts = [
+        f"# Your Personalized Travel Plan for {preferences.destination}\n\n",
+        f"**Trip Duration:** {preferences.duration}\n",
+        f"**Budget:** {preferences.budget}\n",
+        f"**Traveling with:** {preferences.companions}\n\n",
+    ]
     
     for category, places in places_by_category.items():
         if places:
-            plan_text += f"## {category}\n"
+            parts.append(f"## {category}\n")
             for i, place in enumerate(places[:3], 1):  # Top 3 per category
                 rating_text = f" ({place.rating}⭐)" if place.rating else ""
-                plan_text += f"{i}. **{place.name}**{rating_text}\n"
-                plan_text += f"   📍 {place.formatted_address}\n\n"
+                parts.append(f"{i}. **{place.name}**{rating_text}\n   📍 {place.formatted_address}\n\n")
     
-    plan_text += "\n💡 **Tips:**\n"
-    plan_text += f"- This plan is tailored for your {preferences.budget} budget and {', '.join(preferences.interests or [])} interests\n"
-    plan_text += f"- All locations are in or near {preferences.destination}\n"
-    plan_text += "- Consider checking opening hours and making reservations where needed\n"
+    parts.append("\n💡 **Tips:**\n")
+    parts.append(f"- This plan is tailored for your {preferences.budget} budget and {', '.join(preferences.interests or [])} interests\n")
+    parts.append(f"- All locations are in or near {preferences.destination}\n")
+    parts.append("- Consider checking opening hours and making reservations where needed\n")
+    plan_text = "".join(parts)
     
-    state['messages'].append({
-        "role": "assistant",
-        "content": plan_text
-    })
+    push_assistant_message(state, plan_text)
     
-    print(f"✅ Travel plan created with {len(results)} places")
+    logger.info("Travel plan created with %d places", len(results))
     
     return state
 
+async def _geocode_places(places: List[PlaceResult]) -> List[PlaceResult]:
+    """Fill in missing place coordinates with one batched geocode request, dropping places that fail.
+
+    Places sharing an address are geocoded once; addresses geocoded before are answered by
+    MCPClient's geocode cache, so only new addresses reach the network.
+    """
+    missing = [p for p in places if not p.location or not p.location.get('lat') or not p.location.get('lng')]
+    if not missing:
+        return places
+    try:
+        coords = await get_mcp().ageocode_many([p.formatted_address for p in missing])
+    finally:
+        await close_async_client()
+
+    failed = set()
+    for place, location in zip(missing, coords):
+        if location:
+            place.location = location
+        else:
+            logger.warning("Could not geocode %s", place.name)
+            failed.add(id(place))
+    return [p for p in places if id(p) not in failed]
+
+
+NO_ROUTE = "Directions unavailable; plan your route via Google Maps."
+
+
+async def _day_routes(day_slices: List[List[PlaceResult]], mode: str) -> List[str]:
+    """Route summary from each day's first to last place, with every day's directions requested concurrently."""
+    mcp_client = get_mcp()
+    routed = [i for i, day_places in enumerate(day_slices) if len(day_places) > 1]
+    try:
+        results = await asyncio.gather(
+            *(mcp_client.aget_directions(day_slices[i][0].formatted_address, day_slices[i][-1].formatted_address, mode=mode)
+              for i in routed),
+            return_exceptions=True
+        )
+    finally:
+        await close_async_client()
+
+    routes = [NO_ROUTE] * len(day_slices)
+    for i, directions in zip(routed, results):
+        if directions and not isinstance(directions, BaseException):
+            routes[i] = (
+                f"Total distance: {(directions.get('distance') or {}).get('text', 'N/A')}, "
+                f"Duration: {(directions.get('duration') or {}).get('text', 'N/A')}"
+                f"\nSteps: {[step.get('instructions') for step in directions.get('steps', [])]}"
+            )
+    return routes
+
+
 def create_travel_plan_node(state: GraphState) -> GraphState:
     """Compile search results into an optimized travel plan with directions and memory integration."""
     results = state.get('search_results')
@@ -394,79 +655,57 @@ def create_travel_plan_node(state: GraphState) -> GraphState:
     memgpt_system = state.get('memgpt_system')
     
     if not results or len(results) == 0:
-        print("❌ No search results to create plan from")
+        logger.warning("No search results to create plan from")
         return state
         
     if not preferences:
-        print("❌ No preferences available")
+        logger.warning("No preferences available")
         return state
     
-    print("--- CREATING OPTIMIZED TRAVEL PLAN ---")
+    logger.info("--- CREATING OPTIMIZED TRAVEL PLAN ---")
     
     # Initialize MCP client
-    mcp_client = MCPClient()
+    mcp_client = get_mcp()
+    
+    # Geocode all places for coordinates (if not already available), concurrently
+    places_with_coords = asyncio.run(_geocode_places(results))
     
-    # Retrieve long-term memory context if available
+    if len(places_with_coords) < 2:
+        logger.warning("Insufficient places for optimization, using basic plan")
+        return basic_travel_plan_node(state)
+    
+    # Only the optimized plan uses memory context, so search after the basic-plan fallback
     memory_context = ""
     if memgpt_system:
         try:
-            interests_query = ' '.join(preferences.interests) if preferences.interests else ''
-            memory_query = f"{preferences.destination} {interests_query} preferences"
-            past_insights = memgpt_system.memory_store.search_archival(memory_query, page_size=2)
+            past_insights = _search_archival(state, memgpt_system, *_past_insights_search(preferences))
             if past_insights:
-                memory_context = f"Past preferences: {json.dumps(past_insights, indent=2)}"
-                print("✅ Incorporated long-term memory insights")
+                memory_context = f"Past preferences:\n{_render_memories(past_insights)}"
+                logger.info("Incorporated long-term memory insights")
         except Exception as e:
-            print(f"⚠️ Could not retrieve memory: {e}")
-    
-    # Geocode all places for coordinates (if not already available)
-    places_with_coords = []
-    for place in results:
-        if not place.location or not place.location.get('lat') or not place.location.get('lng'):
-            try:
-                coords = mcp_client.geocode(place.formatted_address)
-                place.location = coords
-            except Exception as e:
-                print(f"⚠️ Could not geocode {place.name}: {e}")
-                continue
-        places_with_coords.append(place)
-    
-    if len(places_with_coords) < 2:
-        print("⚠️ Insufficient places for optimization, using basic plan")
-        return basic_travel_plan_node(state)
+            logger.warning("Could not retrieve memory: %s", e)
     
     # Group by category and sort by rating/priority
-    places_by_category = {}
-    for place in places_with_coords:
-        cat = place.category
-        if cat not in places_by_category:
-            places_by_category[cat] = []
-        places_by_category[cat].append(place)
-    
-    for category in places_by_category:
-        places_by_category[category].sort(
-            key=lambda x: (x.priority * 2 + (x.rating or 0)), 
-            reverse=True
-        )
-        places_by_category[category] = places_by_category[category][:5]
+    places_by_category = _group_places_by_category(places_with_coords, limit=5)
     
     selected_places = []
-    all_coords = [(p.location['lat'], p.location['lng']) for p in places_with_coords if p.location]
+    # The distance matrix covers these places, in this order
+    located = [p for p in places_with_coords if p.location][:10]
     
-    if len(all_coords) > 1:
+    if len(located) > 1:
         try:
-            origins = [f"{lat},{lng}" for lat, lng in all_coords[:10]]
+            origins = [f"{p.location['lat']},{p.location['lng']}" for p in located]
             destinations = origins.copy()
             distance_result = mcp_client.calculate_distance_matrix(origins, destinations, mode="driving")
             
-            if distance_result and "rows" in distance_result:
-                daily_groups = _cluster_places_by_distance(places_with_coords, distance_result, max_daily_distance=10000)
+            if distance_result.get("results"):
+                daily_groups = _cluster_places_by_distance(located, distance_result, max_daily_distance=10000)
                 selected_places = [place for group in daily_groups for place in group]
             else:
                 selected_places = places_with_coords[:10]
         except Exception as e:
-            print(f"⚠️ Distance optimization failed: {e}, using top-rated fallback")
-            selected_places = sorted(places_with_coords, key=lambda x: x.priority * 2 + (x.rating or 0), reverse=True)[:10]
+            logger.warning("Distance optimization failed: %s, using top-rated fallback", e)
+            selected_places = _top_places(places_with_coords, 10)
     else:
         selected_places = places_with_coords
     
@@ -474,21 +713,11 @@ def create_travel_plan_node(state: GraphState) -> GraphState:
     daily_itineraries = []
     places_per_day = max(1, len(selected_places) // num_days)
     
-    for day in range(num_days):
-        day_places = selected_places[day * places_per_day:(day + 1) * places_per_day]
-        day_route = "Directions unavailable; plan your route via Google Maps."
-        if len(day_places) > 1:
-            try:
-                directions = mcp_client.get_directions(
-                    day_places[0].formatted_address, 
-                    day_places[-1].formatted_address, 
-                    mode="driving" if preferences.companions != "solo" else "walking"
-                )
-                day_route = f"Total distance: {directions.get('distance', 'N/A')}, Duration: {directions.get('duration', 'N/A')}"
-                day_route += f"\nSteps: {directions.get('steps', [])}"
-            except Exception:
-                pass
-        
+    day_slices = [selected_places[day * places_per_day:(day + 1) * places_per_day] for day in range(num_days)]
+    mode = "driving" if preferences.companions != "solo" else "walking"
+    day_routes = asyncio.run(_day_routes(day_slices, mode))
+    
+    for day, (day_places, day_route) in enumerate(zip(day_slices, day_routes)):
         daily_itineraries.append({
             "day": day + 1,
             "places": day_places,
@@ -509,906 +738,31 @@ def create_travel_plan_node(state: GraphState) -> GraphState:
     
     state['travel_plan'] = optimized_plan
     
-    llm = ChatGoogleGenerativeAI(
-        model=settings.LLM_MODEL,
-        temperature=0.5,
-        api_key=settings.GEMINI_API_KEY
-    )
+    llm = get_llm(0.5)
     
     narrative_prompt = f"""Create a engaging daily travel itinerary for {preferences.destination}.
 Preferences: Duration {preferences.duration}, Budget {preferences.budget}, With {preferences.companions}, Interests: {', '.join(preferences.interests or [])}.
 Memory insights: {memory_context}.
 
 Daily structure:
-{json.dumps([d for d in daily_itineraries], default=lambda o: o.__dict__, indent=2)}
+{orjson.dumps(daily_itineraries, default=lambda o: o.__dict__).decode()}
 
 Include tips based on past preferences and optimize for minimal travel."""
     
     try:
-        narrative = llm.invoke(narrative_prompt).content
-    except:
-        narrative = _generate_basic_narrative(daily_itineraries, preferences, memory_context)
-    
-    state['messages'].append({
-        "role": "assistant",
-        "content": f"# Optimized Travel Plan for {preferences.destination}\n\n{narrative}\n\n**Optimizations:** Selected based on ratings, distances, and your past preferences from memory."
-    })
-    
-    print(f"✅ Optimized plan created with {len(selected_places)} places across {num_days} days")
-    return state
-
-
-def save_trip_to_memory_node(state: GraphState) -> GraphState:
-    """Save completed trip plan to archival memory"""
-    plan = state.get('travel_plan')
-    memgpt_system = state.get('memgpt_system')
-    
-    if not plan:
-        print("⚠️ No travel plan to save")
-        return state
-    
-    if not memgpt_system:
-        print("⚠️ No MemGPT system available to save memory")
-        return state
-    
-    memgpt = memgpt_system
-    
-    # Create trip summary for archival
-    trip_summary = f"""Destination: {plan.destination}
-Total places: {plan.total_places}
-Categories: {', '.join(plan.places_by_category.keys())}
-Top places: {', '.join([p.name for places in plan.places_by_category.values() for p in places[:2]])}
-"""
-    
-    try:
-        # Insert into archival storage
-        memgpt.memory_store.insert_archival(
-            content=trip_summary,
-            metadata={
-                "destination": plan.destination,
-                "type": "trip_plan",
-                "timestamp": datetime.datetime.now().isoformat()
-            }
-        )
-        
-        print(f"✅ Saved trip plan to memory for future reference")
-    except Exception as e:
-        print(f"⚠️ Could not save to memory: {e}")
-    
-    return state
-
-
-def memory_enhanced_planning_node(state: GraphState) -> GraphState:
-    """Generate search queries using memory context"""
-    preferences = state.get('user_preferences')
-    memgpt_system = state.get('memgpt_system')
-    
-    # Validate we have what we need
-    if not preferences:
-        print("❌ No preferences found, cannot generate queries")
-        return state
-    
-    if not hasattr(preferences, 'destination') or not preferences.destination:
-        print("❌ No destination in preferences, cannot generate queries")
-        return state
-    
-    if not memgpt_system:
-        print("⚠️ No MemGPT system found, proceeding without memory context")
-        memgpt = None
-    else:
-        memgpt = memgpt_system
-    
-    print(f"--- GENERATING SEARCH QUERIES for {preferences.destination} ---")
-    
-    # Search for similar past trips if MemGPT available
-    context_str = ""
-    if memgpt:
-        try:
-            interests_query = ' '.join(preferences.interests) if preferences.interests else ''
-            past_trips_query = f"{preferences.destination} {interests_query}"
-            past_trips = memgpt.memory_store.search_archival(past_trips_query, page_size=3)
-            
-            if past_trips:
-                context_str = f"\n\nRelevant past trips:\n{json.dumps(past_trips, indent=2)}"
-        except Exception as e:
-            print(f"⚠️ Could not search past trips: {e}")
-    
-    # Generate queries with memory context
-    llm = ChatGoogleGenerativeAI(
-        model=settings.LLM_MODEL,
-        temperature=0.3,
-        api_key=settings.GEMINI_API_KEY
-    )
-    
-    structured_llm = llm.with_structured_output(SearchQueries)
-
-    user_profile = memgpt.working_context.user_profile if memgpt else "No previous history"
-    
-    query_prompt = f"""Create 6-8 strategic Google Maps search queries for {preferences.destination}.
-    
-Current trip preferences:
-- Duration: {preferences.duration}
-- Budget: {preferences.budget}
-- Companions: {preferences.companions}
-- Interests: {', '.join(preferences.interests or [])}
-- Must-See: {', '.join(preferences.must_see) if preferences.must_see else 'None'}
-
-User context from memory:
-{user_profile}
-{context_str}
-
-Generate diverse queries covering:
-- Top attractions matching their interests
-- Restaurants fitting their budget
-- Activities suitable for their companions
-- Must-see items they mentioned
-
-Make queries specific to the destination and prioritize based on their stated interests.
-
-Return a JSON object with a "queries" field containing an array of objects.
-Each query object should have:
-- category: string (e.g., "Restaurants", "Attractions", "Activities")
-- query: string (the search query for Google Maps)
-- priority: integer (1-5, where 5 is most important)"""
-    
-    try:
-        search_queries_wrapper = structured_llm.invoke(query_prompt)
-        search_queries = search_queries_wrapper.queries
-        
-        if search_queries and len(search_queries) > 0:
-            state['search_queries'] = search_queries
-            print(f"✅ Generated {len(search_queries)} search queries")
-            
-            state['messages'].append({
-                "role": "assistant",
-                "content": f"I've created {len(search_queries)} targeted searches to find the best spots for you. Let me search for places now..."
-            })
-        else:
-            print("❌ No search queries generated")
-            state['messages'].append({
-                "role": "assistant",
-                "content": "I had trouble creating search queries. Could you provide more details about what you'd like to do?"
-            })
-    except Exception as e:
-        print(f"❌ Error generating search queries: {e}")
-        import traceback
-        traceback.print_exc()
-        state['messages'].append({
-            "role": "assistant",
-            "content": "I encountered an error while planning. Let me try a different approach."
-        })
-    
-    return state
-
-
-def execute_searches_node(state: GraphState):
-    """Execute the search queries using the MCP server."""
-    queries = state.get('search_queries')
-    preferences = state.get('user_preferences')
-    
-    if not queries or len(queries) == 0:
-        print("❌ No search queries to execute")
-        return state
-        
-    if not preferences:
-        print("❌ No preferences available")
-        return state
-    
-    print("--- EXECUTING SEARCHES ---")
-    
-    mcp_client = MCPClient()
-    all_results = []
-    
-    # First, geocode the destination to get coordinates for location-based searches
-    try:
-        destination_coords = mcp_client.geocode(preferences.destination)
+        # Streamed so the front end (stream_mode "messages") shows the narrative as it's generated;
+        # the chunks add up to the full message for the plan
+        message = None
+        for chunk in llm.stream(narrative_prompt):
+            message = chunk if message is None else message + chunk
+        narrative = message.content
     except Exception as e:
-        print(f"⚠️ Could not geocode destination: {e}")
-        destination_coords = None
-    
-    for query in queries:
-        try:
-            print(f"Searching: {query.query} (Priority: {query.priority})")
-            
-            # Search for places
-            places = mcp_client.search_places(
-                query.query, 
-                location=destination_coords if destination_coords else None,
-                radius=10000  # 10km radius
-            )
-            
-            # Convert to our PlaceResult model
-            for place in places[:5]:  # Limit to top 5 results per query
-                try:
-                    place_result = PlaceResult(
-                        name=place.get('name', ''),
-                        formatted_address=place.get('formatted_address', ''),
-                        location=place.get('location', {}),
-                        place_id=place.get('place_id', ''),
-                        rating=place.get('rating'),
-                        types=place.get('types', []),
-                        category=query.category,
-                        priority=query.priority
-                    )
-                    all_results.append(place_result)
-                except Exception as e:
-                    print(f"⚠️ Error processing place result: {e}")
-                    continue
-        except Exception as e:
-            print(f"⚠️ Error searching for {query.query}: {e}")
-            continue
-    
-    if len(all_results) > 0:
-        state['search_results'] = all_results
-        
-        state['messages'].append({
-            "role": "assistant",
-            "content": f"Great! I found {len(all_results)} places across different categories. Let me create your personalized travel plan..."
-        })
-        
-        print(f"✅ Found {len(all_results)} total places")
-    else:
-        print("❌ No search results found")
-        state['messages'].append({
-            "role": "assistant",
-            "content": "I couldn't find any places matching your criteria. Could you provide more details or try a different destination?"
-        })
-    
-    return state
-
-
-def basic_travel_plan_node(state: GraphState):
-    """Compile search results into a comprehensive travel plan."""
-    results = state.get('search_results')
-    preferences = state.get('user_preferences')
-    
-    if not results or len(results) == 0:
-        print("❌ No search results to create plan from")
-        return state
-        
-    if not preferences:
-        print("❌ No preferences available")
-        return state
-    
-    print("--- CREATING TRAVEL PLAN ---")
-    
-    # Group places by category
-    places_by_category = {}
-    for place in results:
-        if place.category not in places_by_category:
-            places_by_category[place.category] = []
-        places_by_category[place.category].append(place)
-    
-    # Sort each category by rating and priority
-    for category in places_by_category:
-        places_by_category[category].sort(
-            key=lambda x: (x.priority * 2 + (x.rating or 0)), 
-            reverse=True
-        )
-    
-    # Create the travel plan
-    travel_plan = TravelPlan(
-        destination=preferences.destination,
-        total_places=len(results),
-        places_by_category=places_by_category,
-        recommendations=[]
-    )
-    
-    state['travel_plan'] = travel_plan
-    
-    # Generate a formatted response
-    plan_text = f"# Your Personalized Travel Plan for {preferences.destination}\n\n"
-    plan_text += f"**Trip Duration:** {preferences.duration}\n"
-    plan_text += f"**Budget:** {preferences.budget}\n"
-    plan_text += f"**Traveling with:** {preferences.companions}\n\n"
-    
-    for category, places in places_by_category.items():
-        if places:
-            plan_text += f"## {category}\n"
-            for i, place in enumerate(places[:3], 1):  # Top 3 per category
-                rating_text = f" ({place.rating}⭐)" if place.rating else ""
-                plan_text += f"{i}. **{place.name}**{rating_text}\n"
-                plan_text += f"   📍 {place.formatted_address}\n\n"
-    
-    plan_text += "\n💡 **Tips:**\n"
-    plan_text += f"- This plan is tailored for your {preferences.budget} budget and {', '.join(preferences.interests or [])} interests\n"
-    plan_text += f"- All locations are in or near {preferences.destination}\n"
-    plan_text += "- Consider checking opening hours and making reservations where needed\n"
-    
-    state['messages'].append({
-        "role": "assistant",
-        "content": plan_text
-    })
-    
-    print(f"✅ Travel plan created with {len(results)} places")
-    
-    return state
-
-def create_travel_plan_node(state: GraphState) -> GraphState:
-    """Compile search results into an optimized travel plan with directions and memory integration."""
-    results = state.get('search_results')
-    preferences = state.get('user_preferences')
-    memgpt_system = state.get('memgpt_system')
-    
-    if not results or len(results) == 0:
-        print("❌ No search results to create plan from")
-        return state
-        
-    if not preferences:
-        print("❌ No preferences available")
-        return state
-    
-    print("--- CREATING OPTIMIZED TRAVEL PLAN ---")
-    
-    # Initialize MCP client
-    mcp_client = MCPClient()
-    
-    # Retrieve long-term memory context if available
-    memory_context = ""
-    if memgpt_system:
-        try:
-            interests_query = ' '.join(preferences.interests) if preferences.interests else ''
-            memory_query = f"{preferences.destination} {interests_query} preferences"
-            past_insights = memgpt_system.memory_store.search_archival(memory_query, page_size=2)
-            if past_insights:
-                memory_context = f"Past preferences: {json.dumps(past_insights, indent=2)}"
-                print("✅ Incorporated long-term memory insights")
-        except Exception as e:
-            print(f"⚠️ Could not retrieve memory: {e}")
-    
-    # Geocode all places for coordinates (if not already available)
-    places_with_coords = []
-    for place in results:
-        if not place.location or not place.location.get('lat') or not place.location.get('lng'):
-            try:
-                coords = mcp_client.geocode(place.formatted_address)
-                place.location = coords
-            except Exception as e:
-                print(f"⚠️ Could not geocode {place.name}: {e}")
-                continue
-        places_with_coords.append(place)
-    
-    if len(places_with_coords) < 2:
-        print("⚠️ Insufficient places for optimization, using basic plan")
-        return basic_travel_plan_node(state)
-    
-    # Group by category and sort by rating/priority
-    places_by_category = {}
-    for place in places_with_coords:
-        cat = place.category
-        if cat not in places_by_category:
-            places_by_category[cat] = []
-        places_by_category[cat].append(place)
-    
-    for category in places_by_category:
-        places_by_category[category].sort(
-            key=lambda x: (x.priority * 2 + (x.rating or 0)), 
-            reverse=True
-        )
-        places_by_category[category] = places_by_category[category][:5]
-    
-    selected_places = []
-    all_coords = [(p.location['lat'], p.location['lng']) for p in places_with_coords if p.location]
-    
-    if len(all_coords) > 1:
-        try:
-            origins = [f"{lat},{lng}" for lat, lng in all_coords[:10]]
-            destinations = origins.copy()
-            distance_result = mcp_client.calculate_distance_matrix(origins, destinations, mode="driving")
-            
-            if distance_result and "rows" in distance_result:
-                daily_groups = _cluster_places_by_distance(places_with_coords, distance_result, max_daily_distance=10000)
-                selected_places = [place for group in daily_groups for place in group]
-            else:
-                selected_places = places_with_coords[:10]
-        except Exception as e:
-            print(f"⚠️ Distance optimization failed: {e}, using top-rated fallback")
-            selected_places = sorted(places_with_coords, key=lambda x: x.priority * 2 + (x.rating or 0), reverse=True)[:10]
-    else:
-        selected_places = places_with_coords
-    
-    num_days = _parse_duration_to_days(preferences.duration)
-    daily_itineraries = []
-    places_per_day = max(1, len(selected_places) // num_days)
-    
-    for day in range(num_days):
-        day_places = selected_places[day * places_per_day:(day + 1) * places_per_day]
-        day_route = "Directions unavailable; plan your route via Google Maps."
-        if len(day_places) > 1:
-            try:
-                directions = mcp_client.get_directions(
-                    day_places[0].formatted_address, 
-                    day_places[-1].formatted_address, 
-                    mode="driving" if preferences.companions != "solo" else "walking"
-                )
-                day_route = f"Total distance: {directions.get('distance', 'N/A')}, Duration: {directions.get('duration', 'N/A')}"
-                day_route += f"\nSteps: {directions.get('steps', [])}"
-            except Exception:
-                pass
-        
-        daily_itineraries.append({
-            "day": day + 1,
-            "places": day_places,
-            "route": day_route
-        })
-    
-    optimized_plan = TravelPlan(
-        destination=preferences.destination,
-        total_places=len(selected_places),
-        places_by_category={cat: [p for p in selected_places if p.category == cat] for cat in places_by_category},
-        daily_itineraries=daily_itineraries,
-        optimizations={
-            "selection_criteria": "High rating + proximity (max 10km/day)",
-            "memory_integration": memory_context
-        },
-        recommendations=[]
-    )
-    
-    state['travel_plan'] = optimized_plan
-    
-    llm = ChatGoogleGenerativeAI(
-        model=settings.LLM_MODEL,
-        temperature=0.5,
-        api_key=settings.GEMINI_API_KEY
-    )
-    
-    narrative_prompt = f"""Create a engaging daily travel itinerary for {preferences.destination}.
-Preferences: Duration {preferences.duration}, Budget {preferences.budget}, With {preferences.companions}, Interests: {', '.join(preferences.interests or [])}.
-Memory insights: {memory_context}.
-
-Daily structure:
-{json.dumps([d for d in daily_itineraries], default=lambda o: o.__dict__, indent=2)}
-
-Include tips based on past preferences and optimize for minimal travel."""
-    
-    try:
-        narrative = llm.invoke(narrative_prompt).content
-    except:
-        narrative = _generate_basic_narrative(daily_itineraries, preferences, memory_context)
-    
-    state['messages'].append({
-        "role": "assistant",
-        "content": f"# Optimized Travel Plan for {preferences.destination}\n\n{narrative}\n\n**Optimizations:** Selected based on ratings, distances, and your past preferences from memory."
-    })
-    
-    print(f"✅ Optimized plan created with {len(selected_places)} places across {num_days} days")
-    return state
-
-
-def save_trip_to_memory_node(state: GraphState) -> GraphState:
-    """Save completed trip plan to archival memory"""
-    plan = state.get('travel_plan')
-    memgpt_system = state.get('memgpt_system')
-    
-    if not plan:
-        print("⚠️ No travel plan to save")
-        return state
-    
-    if not memgpt_system:
-        print("⚠️ No MemGPT system available to save memory")
-        return state
-    
-    memgpt = memgpt_system
-    
-    # Create trip summary for archival
-    trip_summary = f"""Destination: {plan.destination}
-Total places: {plan.total_places}
-Categories: {', '.join(plan.places_by_category.keys())}
-Top places: {', '.join([p.name for places in plan.places_by_category.values() for p in places[:2]])}
-"""
-    
-    try:
-        # Insert into archival storage
-        memgpt.memory_store.insert_archival(
-            content=trip_summary,
-            metadata={
-                "destination": plan.destination,
-                "type": "trip_plan",
-                "timestamp": datetime.datetime.now().isoformat()
-            }
-        )
-        
-        print(f"✅ Saved trip plan to memory for future reference")
-    except Exception as e:
-        print(f"⚠️ Could not save to memory: {e}")
-    
-    return state
-
-
-def memory_enhanced_planning_node(state: GraphState) -> GraphState:
-    """Generate search queries using memory context"""
-    preferences = state.get('user_preferences')
-    memgpt_system = state.get('memgpt_system')
-    
-    # Validate we have what we need
-    if not preferences:
-        print("❌ No preferences found, cannot generate queries")
-        return state
-    
-    if not hasattr(preferences, 'destination') or not preferences.destination:
-        print("❌ No destination in preferences, cannot generate queries")
-        return state
-    
-    if not memgpt_system:
-        print("⚠️ No MemGPT system found, proceeding without memory context")
-        memgpt = None
-    else:
-        memgpt = memgpt_system
-    
-    print(f"--- GENERATING SEARCH QUERIES for {preferences.destination} ---")
-    
-    # Search for similar past trips if MemGPT available
-    context_str = ""
-    if memgpt:
-        try:
-            interests_query = ' '.join(preferences.interests) if preferences.interests else ''
-            past_trips_query = f"{preferences.destination} {interests_query}"
-            past_trips = memgpt.memory_store.search_archival(past_trips_query, page_size=3)
-            
-            if past_trips:
-                context_str = f"\n\nRelevant past trips:\n{json.dumps(past_trips, indent=2)}"
-        except Exception as e:
-            print(f"⚠️ Could not search past trips: {e}")
-    
-    # Generate queries with memory context
-    llm = ChatGoogleGenerativeAI(
-        model=settings.LLM_MODEL,
-        temperature=0.3,
-        api_key=settings.GEMINI_API_KEY
-    )
-    
-    structured_llm = llm.with_structured_output(SearchQueries)
-
-    user_profile = memgpt.working_context.user_profile if memgpt else "No previous history"
-    
-    query_prompt = f"""Create 6-8 strategic Google Maps search queries for {preferences.destination}.
-    
-Current trip preferences:
-- Duration: {preferences.duration}
-- Budget: {preferences.budget}
-- Companions: {preferences.companions}
-- Interests: {', '.join(preferences.interests or [])}
-- Must-See: {', '.join(preferences.must_see) if preferences.must_see else 'None'}
-
-User context from memory:
-{user_profile}
-{context_str}
-
-Generate diverse queries covering:
-- Top attractions matching their interests
-- Restaurants fitting their budget
-- Activities suitable for their companions
-- Must-see items they mentioned
-
-Make queries specific to the destination and prioritize based on their stated interests.
-
-Return a JSON object with a "queries" field containing an array of objects.
-Each query object should have:
-- category: string (e.g., "Restaurants", "Attractions", "Activities")
-- query: string (the search query for Google Maps)
-- priority: integer (1-5, where 5 is most important)"""
-    
-    try:
-        search_queries_wrapper = structured_llm.invoke(query_prompt)
-        search_queries = search_queries_wrapper.queries
-        
-        if search_queries and len(search_queries) > 0:
-            state['search_queries'] = search_queries
-            print(f"✅ Generated {len(search_queries)} search queries")
-            
-            state['messages'].append({
-                "role": "assistant",
-                "content": f"I've created {len(search_queries)} targeted searches to find the best spots for you. Let me search for places now..."
-            })
-        else:
-            print("❌ No search queries generated")
-            state['messages'].append({
-                "role": "assistant",
-                "content": "I had trouble creating search queries. Could you provide more details about what you'd like to do?"
-            })
-    except Exception as e:
-        print(f"❌ Error generating search queries: {e}")
-        import traceback
-        traceback.print_exc()
-        state['messages'].append({
-            "role": "assistant",
-            "content": "I encountered an error while planning. Let me try a different approach."
-        })
-    
-    return state
-
-
-def execute_searches_node(state: GraphState):
-    """Execute the search queries using the MCP server."""
-    queries = state.get('search_queries')
-    preferences = state.get('user_preferences')
-    
-    if not queries or len(queries) == 0:
-        print("❌ No search queries to execute")
-        return state
-        
-    if not preferences:
-        print("❌ No preferences available")
-        return state
-    
-    print("--- EXECUTING SEARCHES ---")
-    
-    mcp_client = MCPClient()
-    all_results = []
-    
-    # First, geocode the destination to get coordinates for location-based searches
-    try:
-        destination_coords = mcp_client.geocode(preferences.destination)
-    except Exception as e:
-        print(f"⚠️ Could not geocode destination: {e}")
-        destination_coords = None
-    
-    for query in queries:
-        try:
-            print(f"Searching: {query.query} (Priority: {query.priority})")
-            
-            # Search for places
-            places = mcp_client.search_places(
-                query.query, 
-                location=destination_coords if destination_coords else None,
-                radius=10000  # 10km radius
-            )
-            
-            # Convert to our PlaceResult model
-            for place in places[:5]:  # Limit to top 5 results per query
-                try:
-                    place_result = PlaceResult(
-                        name=place.get('name', ''),
-                        formatted_address=place.get('formatted_address', ''),
-                        location=place.get('location', {}),
-                        place_id=place.get('place_id', ''),
-                        rating=place.get('rating'),
-                        types=place.get('types', []),
-                        category=query.category,
-                        priority=query.priority
-                    )
-                    all_results.append(place_result)
-                except Exception as e:
-                    print(f"⚠️ Error processing place result: {e}")
-                    continue
-        except Exception as e:
-            print(f"⚠️ Error searching for {query.query}: {e}")
-            continue
-    
-    if len(all_results) > 0:
-        state['search_results'] = all_results
-        
-        state['messages'].append({
-            "role": "assistant",
-            "content": f"Great! I found {len(all_results)} places across different categories. Let me create your personalized travel plan..."
-        })
-        
-        print(f"✅ Found {len(all_results)} total places")
-    else:
-        print("❌ No search results found")
-        state['messages'].append({
-            "role": "assistant",
-            "content": "I couldn't find any places matching your criteria. Could you provide more details or try a different destination?"
-        })
-    
-    return state
-
-
-def basic_travel_plan_node(state: GraphState):
-    """Compile search results into a comprehensive travel plan."""
-    results = state.get('search_results')
-    preferences = state.get('user_preferences')
-    
-    if not results or len(results) == 0:
-        print("❌ No search results to create plan from")
-        return state
-        
-    if not preferences:
-        print("❌ No preferences available")
-        return state
-    
-    print("--- CREATING TRAVEL PLAN ---")
-    
-    # Group places by category
-    places_by_category = {}
-    for place in results:
-        if place.category not in places_by_category:
-            places_by_category[place.category] = []
-        places_by_category[place.category].append(place)
-    
-    # Sort each category by rating and priority
-    for category in places_by_category:
-        places_by_category[category].sort(
-            key=lambda x: (x.priority * 2 + (x.rating or 0)), 
-            reverse=True
-        )
-    
-    # Create the travel plan
-    travel_plan = TravelPlan(
-        destination=preferences.destination,
-        total_places=len(results),
-        places_by_category=places_by_category,
-        recommendations=[]
-    )
-    
-    state['travel_plan'] = travel_plan
-    
-    # Generate a formatted response
-    plan_text = f"# Your Personalized Travel Plan for {preferences.destination}\n\n"
-    plan_text += f"**Trip Duration:** {preferences.duration}\n"
-    plan_text += f"**Budget:** {preferences.budget}\n"
-    plan_text += f"**Traveling with:** {preferences.companions}\n\n"
-    
-    for category, places in places_by_category.items():
-        if places:
-            plan_text += f"## {category}\n"
-            for i, place in enumerate(places[:3], 1):  # Top 3 per category
-                rating_text = f" ({place.rating}⭐)" if place.rating else ""
-                plan_text += f"{i}. **{place.name}**{rating_text}\n"
-                plan_text += f"   📍 {place.formatted_address}\n\n"
-    
-    plan_text += "\n💡 **Tips:**\n"
-    plan_text += f"- This plan is tailored for your {preferences.budget} budget and {', '.join(preferences.interests or [])} interests\n"
-    plan_text += f"- All locations are in or near {preferences.destination}\n"
-    plan_text += "- Consider checking opening hours and making reservations where needed\n"
-    
-    state['messages'].append({
-        "role": "assistant",
-        "content": plan_text
-    })
-    
-    print(f"✅ Travel plan created with {len(results)} places")
-    
-    return state
-
-def create_travel_plan_node(state: GraphState) -> GraphState:
-    """Compile search results into an optimized travel plan with directions and memory integration."""
-    results = state.get('search_results')
-    preferences = state.get('user_preferences')
-    memgpt_system = state.get('memgpt_system')
-    
-    if not results or len(results) == 0:
-        print("❌ No search results to create plan from")
-        return state
-        
-    if not preferences:
-        print("❌ No preferences available")
-        return state
-    
-    print("--- CREATING OPTIMIZED TRAVEL PLAN ---")
-    
-    # Initialize MCP client
-    mcp_client = MCPClient()
-    
-    # Retrieve long-term memory context if available
-    memory_context = ""
-    if memgpt_system:
-        try:
-            interests_query = ' '.join(preferences.interests) if preferences.interests else ''
-            memory_query = f"{preferences.destination} {interests_query} preferences"
-            past_insights = memgpt_system.memory_store.search_archival(memory_query, page_size=2)
-            if past_insights:
-                memory_context = f"Past preferences: {json.dumps(past_insights, indent=2)}"
-                print("✅ Incorporated long-term memory insights")
-        except Exception as e:
-            print(f"⚠️ Could not retrieve memory: {e}")
-    
-    # Geocode all places for coordinates (if not already available)
-    places_with_coords = []
-    for place in results:
-        if not place.location or not place.location.get('lat') or not place.location.get('lng'):
-            try:
-                coords = mcp_client.geocode(place.formatted_address)
-                place.location = coords
-            except Exception as e:
-                print(f"⚠️ Could not geocode {place.name}: {e}")
-                continue
-        places_with_coords.append(place)
-    
-    if len(places_with_coords) < 2:
-        print("⚠️ Insufficient places for optimization, using basic plan")
-        return basic_travel_plan_node(state)
-    
-    # Group by category and sort by rating/priority
-    places_by_category = {}
-    for place in places_with_coords:
-        cat = place.category
-        if cat not in places_by_category:
-            places_by_category[cat] = []
-        places_by_category[cat].append(place)
-    
-    for category in places_by_category:
-        places_by_category[category].sort(
-            key=lambda x: (x.priority * 2 + (x.rating or 0)), 
-            reverse=True
-        )
-        places_by_category[category] = places_by_category[category][:5]
-    
-    selected_places = []
-    all_coords = [(p.location['lat'], p.location['lng']) for p in places_with_coords if p.location]
-    
-    if len(all_coords) > 1:
-        try:
-            origins = [f"{lat},{lng}" for lat, lng in all_coords[:10]]
-            destinations = origins.copy()
-            distance_result = mcp_client.calculate_distance_matrix(origins, destinations, mode="driving")
-            
-            if distance_result and "rows" in distance_result:
-                daily_groups = _cluster_places_by_distance(places_with_coords, distance_result, max_daily_distance=10000)
-                selected_places = [place for group in daily_groups for place in group]
-            else:
-                selected_places = places_with_coords[:10]
-        except Exception as e:
-            print(f"⚠️ Distance optimization failed: {e}, using top-rated fallback")
-            selected_places = sorted(places_with_coords, key=lambda x: x.priority * 2 + (x.rating or 0), reverse=True)[:10]
-    else:
-        selected_places = places_with_coords
-    
-    num_days = _parse_duration_to_days(preferences.duration)
-    daily_itineraries = []
-    places_per_day = max(1, len(selected_places) // num_days)
-    
-    for day in range(num_days):
-        day_places = selected_places[day * places_per_day:(day + 1) * places_per_day]
-        day_route = "Directions unavailable; plan your route via Google Maps."
-        if len(day_places) > 1:
-            try:
-                directions = mcp_client.get_directions(
-                    day_places[0].formatted_address, 
-                    day_places[-1].formatted_address, 
-                    mode="driving" if preferences.companions != "solo" else "walking"
-                )
-                day_route = f"Total distance: {directions.get('distance', 'N/A')}, Duration: {directions.get('duration', 'N/A')}"
-                day_route += f"\nSteps: {directions.get('steps', [])}"
-            except Exception:
-                pass
-        
-        daily_itineraries.append({
-            "day": day + 1,
-            "places": day_places,
-            "route": day_route
-        })
-    
-    optimized_plan = TravelPlan(
-        destination=preferences.destination,
-        total_places=len(selected_places),
-        places_by_category={cat: [p for p in selected_places if p.category == cat] for cat in places_by_category},
-        daily_itineraries=daily_itineraries,
-        optimizations={
-            "selection_criteria": "High rating + proximity (max 10km/day)",
-            "memory_integration": memory_context
-        },
-        recommendations=[]
-    )
-    
-    state['travel_plan'] = optimized_plan
-    
-    llm = ChatGoogleGenerativeAI(
-        model=settings.LLM_MODEL,
-        temperature=0.5,
-        api_key=settings.GEMINI_API_KEY
-    )
-    
-    narrative_prompt = f"""Create a engaging daily travel itinerary for {preferences.destination}.
-Preferences: Duration {preferences.duration}, Budget {preferences.budget}, With {preferences.companions}, Interests: {', '.join(preferences.interests or [])}.
-Memory insights: {memory_context}.
-
-Daily structure:
-{json.dumps([d for d in daily_itineraries], default=lambda o: o.__dict__, indent=2)}
-
-Include tips based on past preferences and optimize for minimal travel."""
-    
-    try:
-        narrative = llm.invoke(narrative_prompt).content
-    except:
+        logger.warning("Narrative generation failed, using basic narrative: %s", e)
         narrative = _generate_basic_narrative(daily_itineraries, preferences, memory_context)
     
-    state['messages'].append({
-        "role": "assistant",
-        "content": f"# Optimized Travel Plan for {preferences.destination}\n\n{narrative}\n\n**Optimizations:** Selected based on ratings, distances, and your past preferences from memory."
-    })
+    push_assistant_message(state, f"# Optimized Travel Plan for {preferences.destination}\n\n{narrative}\n\n**Optimizations:** Selected based on ratings, distances, and your past preferences from memory.")
     
-    print(f"✅ Optimized plan created with {len(selected_places)} places across {num_days} days")
+    logger.info("Optimized plan created with %d places across %s days", len(selected_places), num_days)
     return state
 
 
@@ -1418,11 +772,11 @@ def save_trip_to_memory_node(state: GraphState) -> GraphState:
     memgpt_system = state.get('memgpt_system')
     
     if not plan:
-        print("⚠️ No travel plan to save")
+        logger.warning("No travel plan to save")
         return state
     
     if not memgpt_system:
-        print("⚠️ No MemGPT system available to save memory")
+        logger.warning("No MemGPT system available to save memory")
         return state
     
     memgpt = memgpt_system
@@ -1441,12 +795,14 @@ Top places: {', '.join([p.name for places in plan.places_by_category.values() fo
             metadata={
                 "destination": plan.destination,
                 "type": "trip_plan",
-                "timestamp": datetime.datetime.now().isoformat()
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat()
             }
         )
+        state['archival_cache'] = None  # later searches this turn must see the new trip
+        state['travel_plan_ready'] = True
         
-        print(f"✅ Saved trip plan to memory for future reference")
+        logger.info("Saved trip plan to memory for future reference")
     except Exception as e:
-        print(f"⚠️ Could not save to memory: {e}")
+        logger.warning("Could not save to memory: %s", e)
     
     return state
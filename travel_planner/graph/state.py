@@ -5,14 +5,91 @@ from memory.memgpt_system import MemGPTSystem
 
 
 class GraphState(TypedDict):
+    """Graph state. LangGraph keeps only the keys declared here between nodes, so every key a
+    node reads or writes must be listed."""
     # Original fields
     messages: List[Dict[str, str]]
     user_preferences: Optional[PreferencesModel]
     search_queries: Optional[List[SearchQuery]]  # List of SearchQuery objects
     search_results: Optional[List[PlaceResult]]
     travel_plan: Optional[TravelPlan]
+    travel_plan_ready: bool  # set once the plan has been built and saved to memory
     
     # Memory fields
     user_id: str
     memgpt_system: Optional[MemGPTSystem]
     context_usage: Optional[int]
+
+    # Kept up to date by push_user_message so nodes don't scan the history for user turns
+    user_msg_count: int
+    latest_user_message: Optional[str]
+    # user_msg_count as of the last message handed to MemGPT, so a re-entered node doesn't process
+    # it twice while a repeated answer (e.g. "yes" again) still counts as a new message
+    processed_message_count: int
+
+    # Latest assistant message, set by push_assistant_message so the UI needn't inspect the history
+    new_assistant_message: Optional[str]
+
+    # `messages` rendered as "role: content" lines, covering the first conversation_len messages;
+    # extended by conversation_text() rather than rebuilt every turn. conversation_offsets holds
+    # where each message starts in the text, so a window of recent turns is a single slice
+    conversation_text: Optional[str]
+    conversation_len: Optional[int]
+    conversation_offsets: Optional[List[int]]
+
+    # Archival search results for the current user turn, keyed by ArchivalSearch tuple
+    archival_cache: Optional[Dict[Any, List[Dict]]]
+    archival_cache_turn: Optional[int]
+
+
+def push_user_message(state: Dict[str, Any], content: str):
+    """Append a user turn and update the cached count and latest user message."""
+    state['messages'].append({"role": "user", "content": content})
+    state['user_msg_count'] = state.get('user_msg_count', 0) + 1
+    state['latest_user_message'] = content
+
+
+def push_assistant_message(state: Dict[str, Any], content: str):
+    """Append an assistant turn and publish it as new_assistant_message."""
+    state['messages'].append({"role": "assistant", "content": content})
+    state['new_assistant_message'] = content
+
+
+def clear_messages(state: Dict[str, Any]):
+    """Start a fresh conversation, resetting the cached per-conversation fields with it."""
+    state['messages'] = []
+    state['user_msg_count'] = 0
+    state['latest_user_message'] = None
+    state['processed_message_count'] = 0
+    state['new_assistant_message'] = None
+    state['conversation_text'] = None
+    state['conversation_len'] = 0
+    state['conversation_offsets'] = None
+    state['archival_cache'] = None
+
+
+def conversation_text(state: Dict[str, Any], window: Optional[int] = None) -> str:
+    """The message history as "role: content" lines, formatting only messages added since the last call.
+
+    With `window`, only the last `window` messages are returned.
+    """
+    messages = state.get('messages', [])
+    text, length = state.get('conversation_text') or "", state.get('conversation_len') or 0
+    offsets = state.get('conversation_offsets') or []
+    if length > len(messages) or len(offsets) != length:
+        # The history was replaced with a shorter one (or predates the offsets); start over
+        text, length, offsets = "", 0, []
+    if length < len(messages):
+        lines = [f"{m.get('role', 'unknown')}: {m.get('content', '')}" for m in messages[length:]]
+        offsets = list(offsets)
+        start = len(text) + 1 if text else 0
+        for line in lines:
+            offsets.append(start)
+            start += len(line) + 1
+        tail = "\n".join(lines)
+        text = f"{text}\n{tail}" if text else tail
+        state['conversation_text'], state['conversation_len'] = text, len(messages)
+        state['conversation_offsets'] = offsets
+    if window is not None and len(offsets) > window:
+        return text[offsets[-window]:]
+    return text
@@ -1,9 +1,13 @@
+import logging
 from graph.builder import build_travel_planner_with_memory
+from graph.state import push_user_message, clear_messages
 from config.settings import settings
-from memory.memgpt_system import MemGPTSystem
+from memory.memgpt_system import MemGPTPool
+from utils.helpers import EXIT_COMMANDS, MEMORY_COMMAND
 
 
 def main():
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(levelname)s %(name)s: %(message)s")
     print("🌍 Welcome to your AI Travel Planner with Memory!")
     print("I'll remember your preferences and past trips.")
     print("-" * 50)
@@ -30,12 +34,13 @@ def main():
         try:
             # Get user input
             user_input = input("\n👤 You: ").strip()
+            command = user_input.lower()
             
-            if user_input.lower() in ['exit', 'quit', 'bye']:
+            if command in EXIT_COMMANDS:
                 print("👋 Happy travels! Your memories have been saved.")
                 break
             
-            if user_input.lower() == 'memory':
+            if command == MEMORY_COMMAND:
                 if inputs.get('memgpt_system'):
                     memgpt = inputs['memgpt_system']
                     print("\n📝 Your Core Memory:")
@@ -46,14 +51,14 @@ def main():
                     print("\nNo memory system initialized yet.")
                 continue
 
-            if user_input.lower() == 'clear memory':
+            if command == 'clear memory':
                 if inputs.get('memgpt_system'):
                     confirm = input("Are you sure you want to delete all your memories? This cannot be undone. (yes/no): ").strip().lower()
                     if confirm == 'yes':
                         inputs['memgpt_system'].memory_store.clear_all_memory()
                         # Reset the memgpt system in the current state to reflect the cleared memory
-                        inputs['memgpt_system'] = MemGPTSystem(user_id=user_id)
-                        inputs['messages'] = [] # Clear message history as well
+                        inputs['memgpt_system'] = MemGPTPool.reset(user_id)
+                        clear_messages(inputs) # Clear message history as well
                         print("\n🗑️ All memories have been cleared. Let's start over.")
                     else:
                         print("\n❌ Memory clearing cancelled.")
@@ -64,7 +69,7 @@ def main():
             if not user_input:
                 continue
             
-            inputs['messages'].append({"role": "user", "content": user_input})
+            push_user_message(inputs, user_input)
             
             # Run the graph
             for step in graph.stream(inputs):
@@ -78,7 +83,7 @@ def main():
                             print(f"\n🤖 Assistant: {messages[-1]['content']}")
             
             # After a full run, check if a plan was created
-            if inputs.get('travel_plan'):
+            if inputs.get('travel_plan_ready'):
                 print("\n✅ Your travel plan is ready and saved to memory!")
                 
                 another = input("\nWould you like to plan another trip? (yes/no): ").strip().lower()
@@ -88,8 +93,9 @@ def main():
                     inputs['search_queries'] = None
                     inputs['search_results'] = None
                     inputs['travel_plan'] = None
+                    inputs['travel_plan_ready'] = False
                     # Clear messages to start the new planning session fresh
-                    inputs['messages'] = []
+                    clear_messages(inputs)
                     print("\nGreat! Let's plan your next trip. Where and for how long?")
                 else:
                     print("👋 Happy travels!")
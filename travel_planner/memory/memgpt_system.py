@@ -1,27 +1,33 @@
 from typing import List, Dict, Any, Optional
 import json
+import logging
+import threading
+from cachetools import LRUCache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, FunctionMessage
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
 from config.settings import settings
 from models.memory import CoreMemory, ConversationMessage, TripMemory
 from memory.memory_store import MemoryStore
+from utils.llm import get_llm
 from utils.prompts import MEMGPT_SYSTEM_PROMPT
 
+logger = logging.getLogger(__name__)
+
 
 class MemGPTSystem:
     """Complete MemGPT implementation for travel planner"""
+
+    # Functions that only query storage; several in one response can run concurrently
+    READ_ONLY_FUNCTIONS = frozenset({"conversation_search", "archival_memory_search"})
     
     def __init__(self, user_id: str):
         self.user_id = user_id
         
-        # Initialize LLM
-        self.llm = ChatGoogleGenerativeAI(
-            model=settings.LLM_MODEL,
-            temperature=settings.LLM_TEMPERATURE,
-            api_key=settings.GEMINI_API_KEY
-        )
+        # Shared LLM client; every user's instance reuses the same connections
+        self.llm = get_llm(settings.LLM_TEMPERATURE)
         
         # Initialize memory store
         self.memory_store = MemoryStore(user_id)
@@ -39,6 +45,16 @@ class MemGPTSystem:
         
         # Function definitions
         self.functions = self._define_memory_functions()
+
+        # Instructions, function specs and bound tools never change for a session, so they are
+        # rendered once and lead every prompt byte-for-byte, letting Gemini's implicit prefix cache
+        # reuse them across turns; only core memory, the queue summary and new messages follow
+        self.static_prompt = f"""{self.system_instructions}
+
+## AVAILABLE FUNCTIONS
+{json.dumps(self.functions, indent=2)}
+"""
+        self.llm_with_tools = self.llm.bind_tools(self.functions)
     
     def _load_or_create_core_memory(self) -> CoreMemory:
         """Load existing core memory or create new"""
@@ -211,12 +227,8 @@ class MemGPTSystem:
         """Construct prompt from main context components"""
         messages = []
         
-        # System instructions with function definitions
-        system_content = f"""{self.system_instructions}
-
-## AVAILABLE FUNCTIONS
-{json.dumps(self.functions, indent=2)}
-
+        # Stable prefix first, then the parts that change between turns
+        system_content = f"""{self.static_prompt}
 ## CORE MEMORY
 {json.dumps(self.working_context.dict(), indent=2)}
 
@@ -241,8 +253,12 @@ class MemGPTSystem:
         
         return messages
     
-    def process_message(self, user_message: str) -> Dict[str, Any]:
-        """Main MemGPT processing loop with heartbeats"""
+    def process_message(self, user_message: str, infer: bool = True, prefacts: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Main MemGPT processing loop with heartbeats.
+
+        With infer=False the message is only recorded, and any `prefacts` the caller already
+        extracted are appended to the user profile directly, skipping the LLM entirely.
+        """
         # Add user message to queue and recall storage
         msg = ConversationMessage(
             role="user",
@@ -251,6 +267,15 @@ class MemGPTSystem:
         )
         self.fifo_queue.append(msg)
         self.memory_store.save_conversation_message(msg)
+
+        if not infer:
+            if prefacts:
+                self._execute_function("core_memory_append", {"name": "user_profile", "content": " ".join(prefacts)})
+            return {
+                "response": None,
+                "context_usage": self._calculate_context_size(),
+                "max_context": self.max_tokens
+            }
         
         # Check for memory pressure
         current_tokens = self._calculate_context_size()
@@ -289,20 +314,21 @@ class MemGPTSystem:
             # Build prompt from main context
             prompt = self._build_prompt()
             
-            # Bind functions to LLM
-            llm_with_tools = self.llm.bind_tools(self.functions)
-            
             # LLM inference
-            response = llm_with_tools.invoke(prompt)
+            response = self.llm_with_tools.invoke(prompt)
             
             # Check if LLM made function calls
-            if hasattr(response, 'tool_calls') and response.tool_calls:
-                for tool_call in response.tool_calls:
+            if response.tool_calls:
+                prefetched = self._prefetch_read_only(response.tool_calls)
+                for i, tool_call in enumerate(response.tool_calls):
                     # Execute function
-                    function_result = self._execute_function(
-                        tool_call['name'],
-                        tool_call['args']
-                    )
+                    if i in prefetched:
+                        function_result = prefetched[i]
+                    else:
+                        function_result = self._execute_function(
+                            tool_call['name'],
+                            tool_call['args']
+                        )
                     
                     # Add function result to queue
                     func_msg = ConversationMessage(
@@ -338,6 +364,21 @@ class MemGPTSystem:
         
         return final_response or "I apologize, but I encountered an issue processing your request."
     
+    def _prefetch_read_only(self, tool_calls: List[Dict]) -> Dict[int, Dict]:
+        """Run a response's search calls concurrently, keyed by their position in tool_calls.
+
+        Each search is an embedding request plus a vector query, so running them side by side
+        costs the slowest one instead of their sum. Skipped when the same response also inserts
+        into archival memory, so a search never misses a write the model ordered before it.
+        """
+        reads = [(i, tc) for i, tc in enumerate(tool_calls) if tc['name'] in self.READ_ONLY_FUNCTIONS]
+        if len(reads) < 2 or any(tc['name'] == "archival_memory_insert" for tc in tool_calls):
+            return {}
+
+        with ThreadPoolExecutor(max_workers=len(reads)) as pool:
+            results = pool.map(lambda tc: self._execute_function(tc['name'], tc['args']), [tc for _, tc in reads])
+            return {i: result for (i, _), result in zip(reads, results)}
+
     def _execute_function(self, function_name: str, args: Dict) -> Dict:
         """Execute memory management functions"""
         request_heartbeat = args.get('request_heartbeat', False)
@@ -460,4 +501,30 @@ Focus on user preferences, requests, and important context."""
             SystemMessage(content=summary_prompt)
         ]).content
         
-        print(f"✅ Flushed {len(evicted)} messages. New summary created.")
\ No newline at end of file
+        logger.info("Flushed %d messages. New summary created.", len(evicted))
+
+
+class MemGPTPool:
+    """Process-wide MemGPTSystem per user, so sessions reuse a warm instance instead of rebuilding it.
+
+    Only the most recently used MAX_USERS instances are kept; colder ones are rebuilt on demand.
+    """
+
+    MAX_USERS = 32
+    _pool: LRUCache = LRUCache(maxsize=MAX_USERS)
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, user_id: str) -> MemGPTSystem:
+        with cls._lock:
+            memgpt = cls._pool.get(user_id)
+            if memgpt is None:
+                memgpt = cls._pool[user_id] = MemGPTSystem(user_id)
+        return memgpt
+
+    @classmethod
+    def reset(cls, user_id: str) -> MemGPTSystem:
+        """Replace the user's instance, e.g. after their memory was cleared."""
+        with cls._lock:
+            memgpt = cls._pool[user_id] = MemGPTSystem(user_id)
+        return memgpt
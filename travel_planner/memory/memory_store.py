@@ -1,20 +1,47 @@
 from typing import List, Dict, Any, Optional
 import json
+import logging
 import os
 import chromadb
+import ormsgpack
 from chromadb.config import Settings as ChromaSettings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
 from config.settings import settings
 from models.memory import ConversationMessage
 
+logger = logging.getLogger(__name__)
+
+# Cosine distance, so the `1 - distance` relevance scores below are true similarities. Applies to
+# newly created collections; Chroma keeps an existing collection's distance function.
+VECTOR_INDEX_CONFIG = {"hnsw": {"space": "cosine"}}
+
+# Hybrid archival search: vector candidates fetched per requested result, keyword candidates
+# considered, and the reciprocal rank fusion constant (the usual 60 damps any single list's top ranks)
+HYBRID_CANDIDATE_FACTOR = 2
+KEYWORD_CANDIDATES = 20
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[str]:
+    """Merge ranked id lists, scoring each id by the sum of 1 / (k + rank) over the lists it appears in."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+# Core memory is stored as this version byte followed by a msgpack map of user_id -> core memory
+CORE_MEMORY_FORMAT_VERSION = 1
+
 
 class MemoryStore:
     """Manages recall and archival storage"""
     
     def __init__(self, user_id: str):
         self.user_id = user_id
-        self.core_memory_file = os.path.join(settings.CHROMA_PERSIST_DIR, "core_memory.json")
+        self.core_memory_file = os.path.join(settings.CHROMA_PERSIST_DIR, "core_memory.msgpack")
+        self.legacy_core_memory_file = os.path.join(settings.CHROMA_PERSIST_DIR, "core_memory.json")
         
         # Initialize embeddings
         self.embeddings = GoogleGenerativeAIEmbeddings(
@@ -28,25 +55,39 @@ class MemoryStore:
             settings=ChromaSettings(anonymized_telemetry=False)
         )
         
-        # Create collections
+        self._create_collections()
+        
+        # Core memory (simple dict storage - use DB in production)
+        self.core_memory_store = self._load_core_memory_from_file()
+    
+    def _create_collections(self):
+        """Open (or create) the user's recall and archival collections, both in cosine space."""
         self.conversation_collection = self.client.get_or_create_collection(
-            name=f"conversations_{user_id}",
+            name=f"conversations_{self.user_id}",
+            configuration=VECTOR_INDEX_CONFIG,
             metadata={"type": "recall_storage"}
         )
         
         self.archival_collection = self.client.get_or_create_collection(
-            name=f"archival_{user_id}",
+            name=f"archival_{self.user_id}",
+            configuration=VECTOR_INDEX_CONFIG,
             metadata={"type": "archival_storage"}
         )
-        
-        # Core memory (simple dict storage - use DB in production)
-        self.core_memory_store = self._load_core_memory_from_file()
-    
+
     def _load_core_memory_from_file(self) -> Dict:
-        """Load core memory from JSON file"""
+        """Load core memory, falling back to the JSON file written by earlier versions"""
         if os.path.exists(self.core_memory_file):
+            with open(self.core_memory_file, "rb") as f:
+                data = f.read()
+            if not data or data[0] != CORE_MEMORY_FORMAT_VERSION:
+                return {}
             try:
-                with open(self.core_memory_file, "r") as f:
+                return ormsgpack.unpackb(data[1:])
+            except ormsgpack.MsgpackDecodeError:
+                return {}
+        if os.path.exists(self.legacy_core_memory_file):
+            try:
+                with open(self.legacy_core_memory_file, "r") as f:
                     return json.load(f)
             except json.JSONDecodeError:
                 return {}
@@ -59,14 +100,18 @@ class MemoryStore:
     def save_core_memory(self, core_memory: Dict):
         """Save core memory"""
         self.core_memory_store[self.user_id] = core_memory
-        with open(self.core_memory_file, "w") as f:
-            json.dump(self.core_memory_store, f, indent=4)
+        # Write to a temp file and swap it in so a crash mid-write can't corrupt the store
+        tmp_file = f"{self.core_memory_file}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(bytes([CORE_MEMORY_FORMAT_VERSION]) + ormsgpack.packb(self.core_memory_store))
+        os.replace(tmp_file, self.core_memory_file)
 
     def clear_all_memory(self):
         """Deletes all memory associated with the user."""
-        # Clear core memory file
-        if os.path.exists(self.core_memory_file):
-            os.remove(self.core_memory_file)
+        # Clear core memory files
+        for path in (self.core_memory_file, self.legacy_core_memory_file):
+            if os.path.exists(path):
+                os.remove(path)
         self.core_memory_store = {}
         
         # Clear Chroma collections
@@ -74,17 +119,10 @@ class MemoryStore:
             self.client.delete_collection(name=f"conversations_{self.user_id}")
             self.client.delete_collection(name=f"archival_{self.user_id}")
         except Exception as e:
-            print(f"Could not delete collections: {e}")
+            logger.warning("Could not delete collections: %s", e)
         
         # Recreate collections so the app can continue
-        self.conversation_collection = self.client.get_or_create_collection(
-            name=f"conversations_{self.user_id}",
-            metadata={"type": "recall_storage"}
-        )
-        self.archival_collection = self.client.get_or_create_collection(
-            name=f"archival_{self.user_id}",
-            metadata={"type": "archival_storage"}
-        )
+        self._create_collections()
     
     def save_conversation_message(self, message: ConversationMessage):
         """Save message to recall storage"""
@@ -135,15 +173,27 @@ class MemoryStore:
     
     def insert_archival(self, content: str, metadata: Dict):
         """Insert into archival storage"""
-        embedding = self.embeddings.embed_query(content)
+        self.insert_archival_batch([content], [metadata])
+    
+    def insert_archival_batch(self, contents: List[str], metadatas: List[Dict]):
+        """Insert several entries into archival storage with one embedding call and one write."""
+        if not contents:
+            return
+        # Same task type embed_query used for the entries already stored, so old and new stay comparable
+        embeddings = self.embeddings.embed_documents(contents, task_type="RETRIEVAL_QUERY")
         
-        doc_id = f"{self.user_id}_{metadata.get('trip_id', 'doc')}_{len(self.archival_collection.get()['ids'])}"
+        # count() reads the collection size without fetching every stored document
+        start = self.archival_collection.count()
+        doc_ids = [
+            f"{self.user_id}_{metadata.get('trip_id', 'doc')}_{start + i}"
+            for i, metadata in enumerate(metadatas)
+        ]
         
         self.archival_collection.add(
-            documents=[content],
-            embeddings=[embedding],
-            metadatas=[metadata],
-            ids=[doc_id]
+            documents=contents,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            ids=doc_ids
         )
     
     def get_all_archival_memories(self) -> List[Dict]:
@@ -161,28 +211,87 @@ class MemoryStore:
         self,
         query: str,
         page: int = 1,
-        page_size: int = 5
+        page_size: int = 5,
+        where: Optional[Dict] = None,
+        keyword: Optional[str] = None
     ) -> List[Dict]:
         """Search archival storage (past trips)"""
-        query_embedding = self.embeddings.embed_query(query)
+        return self.search_archival_batch([query], [page_size], [where], [keyword])[0]
+
+    def search_archival_batch(
+        self,
+        queries: List[str],
+        page_sizes: List[int],
+        wheres: Optional[List[Optional[Dict]]] = None,
+        keywords: Optional[List[Optional[str]]] = None
+    ) -> List[List[Dict]]:
+        """Run several archival searches with one embedding request and one vector query per filter.
+
+        Results line up with `queries`; each list is cut to its own page size. `wheres` optionally
+        restricts each search to entries with matching metadata (e.g. {"type": "trip_plan"} for
+        the one-per-trip summaries); Chroma applies the filter inside the index search, so only
+        matching entries are scored. A search given a `keywords` entry is hybrid: entries that
+        literally contain the keyword are fused with the vector results by reciprocal rank.
+        """
+        if not queries:
+            return []
+        wheres = wheres or [None] * len(queries)
+        keywords = keywords or [None] * len(queries)
+        # Hybrid searches take a wider vector candidate list for the fusion to rerank
+        fetch_sizes = [size * HYBRID_CANDIDATE_FACTOR if keyword else size for size, keyword in zip(page_sizes, keywords)]
+        query_embeddings = self.embeddings.embed_documents(queries, task_type="RETRIEVAL_QUERY")
+
+        # Searches sharing a filter go to Chroma together
+        groups: Dict[str, List[int]] = {}
+        for i, where in enumerate(wheres):
+            groups.setdefault(json.dumps(where, sort_keys=True), []).append(i)
+
+        batched_results: List[List[Dict]] = [[] for _ in queries]
+        for indices in groups.values():
+            results = self.archival_collection.query(
+                query_embeddings=[query_embeddings[i] for i in indices],
+                n_results=max(fetch_sizes[i] for i in indices),
+                where=wheres[indices[0]],
+                include=["documents", "metadatas", "distances"]
+            )
+            if not results['documents']:
+                continue
+            for row, i in enumerate(indices):
+                fetch_size = fetch_sizes[i]
+                for doc_id, doc, metadata, distance in zip(
+                    results['ids'][row][:fetch_size],
+                    results['documents'][row][:fetch_size],
+                    results['metadatas'][row][:fetch_size],
+                    results['distances'][row][:fetch_size]
+                ):
+                    batched_results[i].append({
+                        "id": doc_id,
+                        "content": doc,
+                        "metadata": metadata,
+                        "relevance_score": 1 - distance
+                    })
+
+        for i, keyword in enumerate(keywords):
+            if keyword:
+                keyword_hits = self._keyword_search_archival(keyword, wheres[i])
+                by_id = {hit["id"]: hit for hit in keyword_hits + batched_results[i]}
+                fused = reciprocal_rank_fusion([[hit["id"] for hit in batched_results[i]], [hit["id"] for hit in keyword_hits]])
+                batched_results[i] = [by_id[doc_id] for doc_id in fused[:page_sizes[i]]]
         
-        results = self.archival_collection.query(
-            query_embeddings=[query_embedding],
-            n_results=page_size,
-            include=["documents", "metadatas", "distances"]
+        return batched_results
+
+    def _keyword_search_archival(self, keyword: str, where: Optional[Dict] = None) -> List[Dict]:
+        """Archival entries containing `keyword`, most mentions first; keyword-only hits have no relevance score."""
+        results = self.archival_collection.get(
+            where=where,
+            where_document={"$contains": keyword},
+            limit=KEYWORD_CANDIDATES,
+            include=["documents", "metadatas"]
         )
-        
-        formatted_results = []
-        if results['documents']:
-            for doc, metadata, distance in zip(
-                results['documents'][0],
-                results['metadatas'][0],
-                results['distances'][0]
-            ):
-                formatted_results.append({
-                    "content": doc,
-                    "metadata": metadata,
-                    "relevance_score": 1 - distance
-                })
-        
-        return formatted_results
\ No newline at end of file
+        needle = keyword.lower()
+        hits = [
+            {"id": doc_id, "content": doc, "metadata": metadata, "relevance_score": None}
+            for doc_id, doc, metadata in zip(results['ids'], results['documents'], results['metadatas'])
+        ]
+        hits.sort(key=lambda hit: hit["content"].lower().count(needle), reverse=True)
+        return hits
\ No newline at end of file
@@ -10,6 +10,7 @@ class PlaceResult(BaseModel):
     rating: float = None
     types: List[str] = []
     category: str  # From our search query
+    categories: List[str] = []  # Every query category that found this place, `category` first
     priority: int  # From our search query
 
 class TravelPlan(BaseModel):
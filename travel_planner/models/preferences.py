@@ -1,3 +1,4 @@
+from functools import cached_property
 from pydantic import BaseModel, Field
 from typing import List
 
@@ -11,6 +12,22 @@ class PreferencesModel(BaseModel):
     must_see: List[str] | None = Field(default=None, description="Specific sights or activities user must see/do")
     ready_to_plan: bool = Field(default=False, description="Flag to indicate when to start planning the trip.")
 
+    @cached_property
+    def search_key(self) -> str:
+        """Destination plus interests, the base of the archival memory searches; computed once per preferences."""
+        interests_query = ' '.join(self.interests) if self.interests else ''
+        return f"{self.destination} {interests_query}"
+
+    # The cached key lives in __dict__, so drop it whenever a field changes or is copied over
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        self.__dict__.pop('search_key', None)
+
+    def model_copy(self, *, update=None, deep=False):
+        copied = super().model_copy(update=update, deep=deep)
+        copied.__dict__.pop('search_key', None)
+        return copied
+
 class SearchQuery(BaseModel):
     """Represents a single, strategic query to be executed."""
     category: str = Field(..., description="A high-level category for the search, e.g., 'Restaurants', 'Attractions'.")
@@ -20,3 +37,8 @@ class SearchQuery(BaseModel):
 class SearchQueries(BaseModel):
     """A wrapper containing a list of search queries."""
     queries: List[SearchQuery] = Field(..., description="List of 6-8 strategic search queries")
+
+class PlanBootstrap(BaseModel):
+    """Trip preferences and, once the trip is fully specified, its search queries, extracted in one LLM call."""
+    preferences: PreferencesModel = Field(..., description="Trip-specific preferences from the latest user message")
+    queries: List[SearchQuery] = Field(default_factory=list, description="6-8 strategic search queries; empty unless both destination and duration are known")
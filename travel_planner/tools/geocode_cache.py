@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Optional
+
+from tools.mcp_client import get_mcp
+
+
+DEFAULT_GEOCODE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "geocode_cache.sqlite3")
+
+# Destinations don't move, but a month-long TTL lets corrected geocoder results through eventually
+GEOCODE_TTL_SECONDS = 30 * 24 * 60 * 60
+
+_conn: Optional[sqlite3.Connection] = None
+_conn_lock = threading.Lock()
+
+
+def normalize_destination(destination: str) -> str:
+    """Canonical cache key for a destination, so "Rome", " rome " and "ＲＯＭＥ" share one entry."""
+    return unicodedata.normalize("NFKC", destination).strip().casefold()
+
+
+def _connect() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(DEFAULT_GEOCODE_CACHE_PATH, check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode_cache (dest TEXT PRIMARY KEY, lat REAL NOT NULL, lng REAL NOT NULL, ts INTEGER NOT NULL)"
+        )
+    return _conn
+
+
+def _load(key: str) -> Optional[Dict[str, float]]:
+    with _conn_lock:
+        row = _connect().execute(
+            "SELECT lat, lng FROM geocode_cache WHERE dest = ? AND ts >= ?",
+            (key, int(time.time()) - GEOCODE_TTL_SECONDS)
+        ).fetchone()
+    return {"lat": row[0], "lng": row[1]} if row else None
+
+
+def _save(key: str, coords: Dict[str, float]):
+    with _conn_lock:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO geocode_cache (dest, lat, lng, ts) VALUES (?, ?, ?, ?)",
+            (key, coords["lat"], coords["lng"], int(time.time()))
+        )
+        conn.commit()
+
+
+@lru_cache(maxsize=1024)
+def _geocode_cached(key: str) -> Dict[str, float]:
+    coords = _load(key)
+    if coords is None:
+        coords = get_mcp().geocode(key)
+        if not coords:
+            # Raising keeps failed lookups out of the lru_cache so they are retried next run
+            raise LookupError(f"Could not geocode '{key}'")
+        _save(key, coords)
+    return coords
+
+
+def geocode_destination(destination: str) -> Dict[str, float]:
+    """Geocode a destination through an in-process LRU backed by a persistent sqlite cache."""
+    key = normalize_destination(destination or "")
+    if not key:
+        return {}
+    try:
+        return dict(_geocode_cached(key))
+    except LookupError:
+        return {}
@@ -1,18 +1,383 @@
 # mcp_client.py (Corrected Version)
 
-import requests
-import json
-from typing import List, Dict, Any
+import asyncio
+import atexit
+import logging
+import math
+import os
+import threading
+import time
+import unicodedata
+import weakref
+from functools import lru_cache
+import httpx
+import orjson
+from cachetools import LRUCache, TLRUCache
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from typing import List, Dict, Any, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_SSE_DATA_PREFIX = b"data: "
+
+
+class _SSEDataReader:
+    """Incremental SSE parser: feed raw byte chunks, get back the complete `data:` payloads.
+
+    Lines are matched on bytes in a single reusable buffer, so nothing is decoded or split
+    beyond the JSON payloads themselves, and fragmented streams never get re-scanned.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        buffer = self._buffer
+        buffer += chunk
+        payloads = []
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end == -1:
+                break
+            if buffer.startswith(_SSE_DATA_PREFIX, start):
+                line_end = end - 1 if end > start and buffer[end - 1] == 0x0D else end  # strip \r
+                payloads.append(bytes(buffer[start + len(_SSE_DATA_PREFIX):line_end]))
+            start = end + 1
+        del buffer[:start]
+        return payloads
+
+
+def _is_json_response(response: httpx.Response) -> bool:
+    return response.headers.get("Content-Type", "").startswith("application/json")
+
+
+def _extend_messages(messages: List[Dict[str, Any]], payload: bytes):
+    parsed = orjson.loads(payload)
+    messages.extend(parsed if isinstance(parsed, list) else [parsed])
+
+
+def _read_messages(response: httpx.Response, expected: int) -> List[Dict[str, Any]]:
+    """JSON-RPC messages from a streamed response, stopping as soon as `expected` have arrived."""
+    try:
+        response.raise_for_status()
+        messages: List[Dict[str, Any]] = []
+        if _is_json_response(response):
+            _extend_messages(messages, response.read())
+            return messages
+
+        # The server responds with Server-Sent Events (SSE), not raw JSON.
+        reader = _SSEDataReader()
+        for chunk in response.iter_bytes():
+            for payload in reader.feed(chunk):
+                _extend_messages(messages, payload)
+            if len(messages) >= expected:
+                break
+        return messages
+    finally:
+        response.close()
+
+
+async def _aread_messages(response: httpx.Response, expected: int) -> List[Dict[str, Any]]:
+    """Async _read_messages."""
+    try:
+        response.raise_for_status()
+        messages: List[Dict[str, Any]] = []
+        if _is_json_response(response):
+            _extend_messages(messages, await response.aread())
+            return messages
+
+        reader = _SSEDataReader()
+        async for chunk in response.aiter_bytes():
+            for payload in reader.feed(chunk):
+                _extend_messages(messages, payload)
+            if len(messages) >= expected:
+                break
+        return messages
+    finally:
+        await response.aclose()
+
+
+class MCPBatchNotSupported(Exception):
+    """Raised when the server rejects or mishandles a batched request; callers should fall back to single calls."""
+
+
+class MCPBatchToolUnavailable(MCPBatchNotSupported):
+    """The server doesn't provide the batch tool at all, so later requests needn't try it again."""
+
+
+# How a server says it has no such tool: our own server's reply, or JSON-RPC "method not found"
+_UNKNOWN_TOOL_MARKERS = ("Unknown tool", "-32601", "Method not found")
+
+
+class _MCPServerUnavailable(httpx.HTTPStatusError):
+    """A gateway/unavailable status (502, 503, 504) that is worth retrying."""
+
+
+# ---------------------
+# HTTP TRANSPORT
+# ---------------------
+MCP_HEADERS = {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"}
+MCP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+
+# Separate stage budgets so a stuck connect fails (and is retried) fast instead of eating the read budget
+MCP_CONNECT_TIMEOUT = settings.MCP_CONNECT_TIMEOUT
+MCP_READ_TIMEOUT = settings.MCP_READ_TIMEOUT
+MCP_TIMEOUT = httpx.Timeout(connect=MCP_CONNECT_TIMEOUT, read=MCP_READ_TIMEOUT, write=5.0, pool=2.0)
+
+if MCP_CONNECT_TIMEOUT >= MCP_READ_TIMEOUT:
+    logger.warning(
+        "MCP_CONNECT_TIMEOUT (%ss) is not below MCP_READ_TIMEOUT (%ss); connect failures will be slow to retry",
+        MCP_CONNECT_TIMEOUT, MCP_READ_TIMEOUT
+    )
+
+# Connection setup failures and gateway/unavailable statuses are retried: in both cases the tool
+# call was refused before it ran, so replaying it is safe. Read timeouts are not retried since
+# the tool may already be running.
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+_retry_on_connect_failure = retry(
+    retry=retry_if_exception_type((httpx.ConnectError, httpx.ConnectTimeout, _MCPServerUnavailable)),
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=0.2, max=2.0),
+    reraise=True,
+)
+
+# Cap on in-flight async tool calls per event loop
+MAX_CONCURRENT_CALLS = 20
+
+# Server-side bulk search tool, so all of a plan's queries go out in one MCP request
+SEARCH_BATCH_TOOL = "maps_search_places_batch"
+
+_shared_session: Optional[httpx.Client] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> httpx.Client:
+    """Return the process-wide HTTP client so MCP calls reuse pooled keep-alive connections.
+
+    Nodes construct a fresh MCPClient on every graph run; keeping the client at module
+    scope means those instances (and the worker threads searching concurrently) share one pool.
+    """
+    global _shared_session
+    if _shared_session is None:
+        with _session_lock:
+            if _shared_session is None:
+                _shared_session = httpx.Client(headers=MCP_HEADERS, limits=MCP_LIMITS, timeout=MCP_TIMEOUT)
+    return _shared_session
+
+
+@atexit.register
+def close_session():
+    """Close the process-wide HTTP client; the next call opens a fresh pool."""
+    global _shared_session
+    with _session_lock:
+        session, _shared_session = _shared_session, None
+    if session is not None:
+        session.close()
+
+
+# An AsyncClient is tied to the event loop it first runs on, and the CLI starts a fresh loop
+# per turn, so keep one client (with its concurrency cap) per running loop.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    """Pooled AsyncClient and in-flight call limiter for the running event loop."""
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        entry = (
+            httpx.AsyncClient(headers=MCP_HEADERS, limits=MCP_LIMITS, timeout=MCP_TIMEOUT),
+            asyncio.Semaphore(MAX_CONCURRENT_CALLS),
+        )
+        _async_clients[loop] = entry
+    return entry
+
+
+async def close_async_client():
+    """Close the running loop's AsyncClient; call before the loop shuts down."""
+    entry = _async_clients.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[0].aclose()
+
+
+# ---------------------
+# RESULT CACHES
+# ---------------------
+# Process-wide, so every MCPClient instance (one per graph run) shares them. Only successful
+# lookups are stored; failures are retried on the next call.
+_cache_lock = threading.Lock()
+_geocode_cache: LRUCache = LRUCache(maxsize=1024)
+# Places open, close and get re-rated, so search results expire after a day. Entries are
+# (stored_at, places) and expire by the wall clock, so their age survives a save and reload
+# through MCP_CACHE_FILE instead of restarting at every launch
+SEARCH_CACHE_TTL = 24 * 60 * 60
+_search_cache: TLRUCache = TLRUCache(
+    maxsize=1024, ttu=lambda _key, entry, _now: entry[0] + SEARCH_CACHE_TTL, timer=time.time
+)
+# Search centers are rounded to ~110 m, so nearby geocodes of one destination share entries
+SEARCH_COORD_PRECISION = 3
+_last_geocode: Tuple[Optional[str], Dict[str, float]] = (None, {})
+
+# Optional JSON sidecar (set MCP_CACHE_FILE) so the caches survive restarts
+MCP_CACHE_FILE = settings.MCP_CACHE_FILE
+
+SearchKey = Tuple[str, Optional[float], Optional[float], Optional[int]]
+
+
+def _normalize_text(text: str) -> str:
+    # NFKC folds full-width and compatibility forms, so "Rome" and "ＲＯＭＥ" share a cache entry
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def _valid_text(text: Any) -> bool:
+    return isinstance(text, str) and bool(text.strip())
+
+
+def _valid_location(location: Optional[Dict[str, float]]) -> bool:
+    """True for no location, or one with finite in-range lat/lng."""
+    if not location:
+        return True
+    try:
+        lat, lng = float(location["lat"]), float(location["lng"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return math.isfinite(lat) and math.isfinite(lng) and -90 <= lat <= 90 and -180 <= lng <= 180
+
+
+def _search_key(query: str, location: Optional[Dict[str, float]], radius: int) -> SearchKey:
+    if location:
+        # Converted the same way _valid_location checks them, so numeric strings key like floats
+        return (
+            _normalize_text(query),
+            round(float(location["lat"]), SEARCH_COORD_PRECISION),
+            round(float(location["lng"]), SEARCH_COORD_PRECISION),
+            radius,
+        )
+    return (_normalize_text(query), None, None, None)
+
+
+def _get_search(key: SearchKey) -> Optional[List[Dict]]:
+    with _cache_lock:
+        entry = _search_cache.get(key)
+    return entry[1] if entry is not None else None
+
+
+def _put_search(key: SearchKey, places: List[Dict]):
+    with _cache_lock:
+        _search_cache[key] = (time.time(), places)
+
+
+def clear_search_cache():
+    """Forget cached place searches, e.g. when the user asks for fresh results."""
+    with _cache_lock:
+        _search_cache.clear()
+
+
+def _get_geocode(key: str) -> Optional[Dict[str, float]]:
+    global _last_geocode
+    # Back-to-back lookups of the same address skip even the LRU
+    last_key, last_coords = _last_geocode
+    if key == last_key:
+        return last_coords
+    with _cache_lock:
+        coords = _geocode_cache.get(key)
+    if coords is not None:
+        _last_geocode = (key, coords)
+    return coords
+
+
+def _put_geocode(key: str, coords: Dict[str, float]):
+    global _last_geocode
+    with _cache_lock:
+        _geocode_cache[key] = coords
+    _last_geocode = (key, coords)
+
+
+def _load_cache_file(path: str):
+    try:
+        with open(path, "rb") as f:
+            data = orjson.loads(f.read())
+    except FileNotFoundError:
+        return
+    except (OSError, orjson.JSONDecodeError) as e:
+        logger.warning("Ignoring unreadable MCP cache file %s: %s", path, e)
+        return
+
+    for address, coords in data.get("geocode", {}).items():
+        _geocode_cache[address] = coords
+    # Searches saved without a timestamp have no known age, so they're dropped rather than trusted
+    now = time.time()
+    for entry in data.get("search", []):
+        if len(entry) != 3:
+            continue
+        key, stored_at, places = entry
+        if now - stored_at < SEARCH_CACHE_TTL:
+            _search_cache[tuple(key)] = (stored_at, places)
+
+
+def _save_cache_file(path: str):
+    with _cache_lock:
+        data = {
+            "geocode": dict(_geocode_cache.items()),
+            "search": [[list(key), stored_at, places] for key, (stored_at, places) in _search_cache.items()],
+        }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(data))
+    os.replace(tmp_path, path)
+
+
+if MCP_CACHE_FILE:
+    _load_cache_file(MCP_CACHE_FILE)
+
+    @atexit.register
+    def _persist_caches():
+        try:
+            _save_cache_file(MCP_CACHE_FILE)
+        except OSError as e:
+            logger.warning("Could not write MCP cache file %s: %s", MCP_CACHE_FILE, e)
+
+
+# Single tool calls only vary in params, so the envelope around them is encoded once
+_RPC_PREFIX = b'{"jsonrpc":"2.0","id":1,"method":"tools/call","params":'
+_RPC_SUFFIX = b'}'
+
 
 class MCPClient:
-    def __init__(self, base_url: str = "http://localhost:8000"):
-        self.base_url = base_url
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = base_url or settings.MCP_SERVER_URL
 
-    def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """Call a tool on the MCP server and correctly parse the SSE response."""
-        payload = {
+    # Connections are pooled process-wide, so closing releases them for every MCPClient;
+    # later calls simply open a new pool.
+    def close(self):
+        close_session()
+
+    def __enter__(self) -> "MCPClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    async def aclose(self):
+        await close_async_client()
+
+    async def __aenter__(self) -> "MCPClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    # --- JSON-RPC plumbing shared by the sync and async paths ---
+
+    @staticmethod
+    def _tool_request(tool_name: str, arguments: Dict[str, Any], request_id: int = 1) -> Dict[str, Any]:
+        return {
             "jsonrpc": "2.0",
-            "id": 1,
+            "id": request_id,
             "method": "tools/call",
             "params": {
                 "name": tool_name,
@@ -20,104 +385,410 @@ class MCPClient:
             }
         }
 
-        # print(f"""
-        #     payload: {json.dumps(payload)}
-        #       """)
+    @staticmethod
+    def _tool_payload(tool_name: str, arguments: Dict[str, Any]) -> bytes:
+        """Encoded _tool_request(tool_name, arguments) for a single call."""
+        return _RPC_PREFIX + orjson.dumps({"name": tool_name, "arguments": arguments}) + _RPC_SUFFIX
+
+    @staticmethod
+    def _tool_error(error: Any) -> Dict[str, Any]:
+        return {"content": [{"type": "text", "text": f"Error: {error}"}], "isError": True}
+
+    @staticmethod
+    def _tool_result(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if not messages:
+            raise ValueError("No 'data:' line found in the server's SSE response")
+        parsed_response = messages[0]
+
+        if "error" in parsed_response:
+            raise Exception(f"MCP Error: {parsed_response['error']}")
+
+        # The actual tool result is nested within the 'result' key
+        return parsed_response.get("result", {})
+
+    @classmethod
+    def _batch_results(cls, calls: List[Tuple[str, Dict[str, Any]]], messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        by_id = {message.get("id"): message for message in messages}
+        if len(calls) and not any(i in by_id for i in range(len(calls))):
+            raise MCPBatchNotSupported("Server returned no responses for the batched calls")
+
+        results = []
+        for i, (name, _) in enumerate(calls):
+            message = by_id.get(i)
+            if message is None or "error" in message:
+                error = message["error"] if message else "no response in batch"
+                logger.error("Error calling MCP tool %s: %s", name, error)
+                results.append(cls._tool_error(error))
+            else:
+                results.append(message.get("result", {}))
+        return results
+
+    def _batch_payload(self, calls: List[Tuple[str, Dict[str, Any]]]) -> bytes:
+        return orjson.dumps([self._tool_request(name, arguments, i) for i, (name, arguments) in enumerate(calls)])
+
+    @staticmethod
+    def _server_unavailable(response: httpx.Response) -> _MCPServerUnavailable:
+        return _MCPServerUnavailable(
+            f"MCP server returned {response.status_code}", request=response.request, response=response
+        )
+
+    @_retry_on_connect_failure
+    def _send(self, content: bytes) -> httpx.Response:
+        client = get_session()
+        response = client.send(client.build_request("POST", f"{self.base_url}/mcp", content=content), stream=True)
+        if response.status_code in RETRY_STATUSES:
+            response.close()
+            raise self._server_unavailable(response)
+        return response
+
+    @_retry_on_connect_failure
+    async def _asend(self, client: httpx.AsyncClient, content: bytes) -> httpx.Response:
+        response = await client.send(client.build_request("POST", f"{self.base_url}/mcp", content=content), stream=True)
+        if response.status_code in RETRY_STATUSES:
+            await response.aclose()
+            raise self._server_unavailable(response)
+        return response
+
+    def _request(self, content: bytes, expected: int = 1) -> List[Dict[str, Any]]:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("MCP request payload=%s", content)
+        return _read_messages(self._send(content), expected)
 
+    async def _arequest(self, content: bytes, expected: int = 1) -> List[Dict[str, Any]]:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("MCP request payload=%s", content)
+        client, semaphore = get_async_client()
+        async with semaphore:
+            return await _aread_messages(await self._asend(client, content), expected)
+
+    # --- Tool calls ---
+
+    def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Call a tool on the MCP server and correctly parse the SSE response."""
         try:
-            response = requests.post(
-                f"{self.base_url}/mcp",
-                json=payload,
-                headers={"Content-Type": "application/json", "Accept": "application/json, text/event-stream"},
-                timeout=30
-            )
-            # print(f"Response: {response.text}")
-            response.raise_for_status()
-
-            # --- START OF THE CRITICAL FIX ---
-            # The server responds with Server-Sent Events (SSE), not raw JSON.
-            # We must find the line with the JSON data and parse it manually.
-            response_text = response.text
-
-            # Find the line that starts with 'data: '
-            data_line = next((line for line in response_text.splitlines() if line.startswith('data: ')), None)
-
-            if not data_line:
-                raise ValueError("No 'data:' line found in the server's SSE response")
-
-            # Remove the 'data: ' prefix to get the clean JSON string
-            json_str = data_line[len('data: '):]
-            
-            # Parse the clean JSON string
-            parsed_response = json.loads(json_str)
-            # --- END OF THE CRITICAL FIX ---
-
-            if "error" in parsed_response:
-                raise Exception(f"MCP Error: {parsed_response['error']}")
-
-            # The actual tool result is nested within the 'result' key
-            return parsed_response.get("result", {})
+            return self._tool_result(self._request(self._tool_payload(tool_name, arguments)))
+        except Exception as e:
+            logger.error("Error calling MCP tool %s: %s", tool_name, e)
+            return self._tool_error(e)
 
+    async def acall_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Async call_tool; concurrent callers share a pooled client and at most MAX_CONCURRENT_CALLS run at once."""
+        try:
+            return self._tool_result(await self._arequest(self._tool_payload(tool_name, arguments)))
         except Exception as e:
-            print(f"Error calling MCP tool {tool_name}: {e}")
-            return {"content": [{"type": "text", "text": f"Error: {str(e)}"}], "isError": True}
+            logger.error("Error calling MCP tool %s: %s", tool_name, e)
+            return self._tool_error(e)
 
-    def search_places(self, query: str, location: Dict[str, float] = None, radius: int = 10000) -> List[Dict]:
-        """Search for places using the MCP server."""
+    def call_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Send several tool calls as one JSON-RPC batch and return their results in call order.
+
+        Raises MCPBatchNotSupported if the server can't answer the batch as a whole, so the
+        caller can fall back to individual (concurrent) calls.
+        """
+        try:
+            messages = self._request(self._batch_payload(calls), expected=len(calls))
+        except Exception as e:
+            raise MCPBatchNotSupported(f"Batch request failed: {e}") from e
+        return self._batch_results(calls, messages)
+
+    async def acall_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Async call_tools_batch."""
+        try:
+            messages = await self._arequest(self._batch_payload(calls), expected=len(calls))
+        except Exception as e:
+            raise MCPBatchNotSupported(f"Batch request failed: {e}") from e
+        return self._batch_results(calls, messages)
+
+    # --- Place search ---
+
+    @staticmethod
+    def _search_args(query: str, location: Dict[str, float] = None, radius: int = 10000) -> Dict[str, Any]:
         args = {"query": query}
         if location:
             args["location"] = f"{location['lat']},{location['lng']}" # Pass location as a string for compatibility
             args["radius"] = radius
+        return args
 
-        result = self.call_tool("maps_search_places", args)
+    def search_places(self, query: str, location: Dict[str, float] = None, radius: int = 10000) -> List[Dict]:
+        """Search for places using the MCP server, reusing earlier results for the same query and area."""
+        if not self._valid_search(query, location):
+            return []
+        key = _search_key(query, location, radius)
+        places = _get_search(key)
+        if places is None:
+            places = self._parse_places(query, self.call_tool("maps_search_places", self._search_args(query, location, radius)))
+            if places is None:
+                return []
+            _put_search(key, places)
+        return list(places)
 
-        if result.get("isError"):
-            print(f"Search failed for query '{query}': {result}")
+    async def asearch_places(self, query: str, location: Dict[str, float] = None, radius: int = 10000) -> List[Dict]:
+        """Async search_places."""
+        if not self._valid_search(query, location):
             return []
+        key = _search_key(query, location, radius)
+        places = _get_search(key)
+        if places is None:
+            places = self._parse_places(query, await self.acall_tool("maps_search_places", self._search_args(query, location, radius)))
+            if places is None:
+                return []
+            _put_search(key, places)
+        return list(places)
+
+    @staticmethod
+    def _valid_search(query: str, location: Optional[Dict[str, float]]) -> bool:
+        """Catch inputs the server would only reject, before paying for the round-trip."""
+        if not _valid_text(query):
+            logger.warning("Skipping place search with empty query")
+            return False
+        if not _valid_location(location):
+            logger.warning("Skipping place search for '%s' with invalid location %s", query, location)
+            return False
+        return True
+
+    @staticmethod
+    def _split_cached(queries: List[str], location: Optional[Dict[str, float]], radius: int):
+        # Invalid queries resolve to [] locally and never become misses
+        keys = [_search_key(query, location, radius) if _valid_text(query) else None for query in queries]
+        found = [_get_search(key) if key is not None else [] for key in keys]
+        misses = [i for i, places in enumerate(found) if places is None]
+        return keys, found, misses
+
+    @staticmethod
+    def _search_batch_args(queries: List[str], location: Optional[Dict[str, float]], radius: int) -> Dict[str, Any]:
+        args = {"searches": [{"query": query} for query in queries]}
+        if location:
+            args["location"] = {"latitude": location["lat"], "longitude": location["lng"]}
+            args["radius"] = radius
+        return args
+
+    @staticmethod
+    def _parse_search_batch(queries: List[str], result: Dict[str, Any]) -> List[Optional[List[Dict]]]:
+        """Per-query places from a maps_search_places_batch result; None marks a failed search."""
+        if result.get("isError"):
+            # Timeouts, connection errors and 5xx also arrive as isError; only a missing tool is permanent
+            if any(marker in str(result) for marker in _UNKNOWN_TOOL_MARKERS):
+                raise MCPBatchToolUnavailable(f"Server has no batched search tool: {result}")
+            raise MCPBatchNotSupported(f"Batched search failed: {result}")
+        try:
+            data = result.get("structuredContent") or orjson.loads(result["content"][0]["text"])
+            entries = data["results"]
+        except (orjson.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+            raise MCPBatchNotSupported(f"Unreadable batched search result: {e}") from e
+        if len(entries) != len(queries):
+            raise MCPBatchNotSupported(f"Batched search returned {len(entries)} results for {len(queries)} queries")
+
+        parsed = []
+        for query, entry in zip(queries, entries):
+            if "error" in entry:
+                logger.warning("Search failed for query '%s': %s", query, entry["error"])
+                parsed.append(None)
+            else:
+                parsed.append(entry.get("places", []))
+        return parsed
+
+    @staticmethod
+    def _merge_batch(keys, found, misses, fetched) -> List[List[Dict]]:
+        for i, places in zip(misses, fetched):
+            if places is not None:
+                _put_search(keys[i], places)
+            found[i] = places
+        return [list(places) if places is not None else [] for places in found]
+
+    def search_places_batch(self, queries: List[str], location: Dict[str, float] = None, radius: int = 10000) -> List[List[Dict]]:
+        """Run several place searches with one maps_search_places_batch call; results line up with `queries`.
+
+        Cached queries are answered locally and only the misses are sent to the server. Raises
+        MCPBatchNotSupported if the server can't run the batch, so the caller can fall back to
+        individual (concurrent) searches.
+        """
+        if not _valid_location(location):
+            logger.warning("Skipping place searches with invalid location %s", location)
+            return [[] for _ in queries]
+        keys, found, misses = self._split_cached(queries, location, radius)
+        if misses:
+            miss_queries = [queries[i] for i in misses]
+            result = self.call_tool(SEARCH_BATCH_TOOL, self._search_batch_args(miss_queries, location, radius))
+            return self._merge_batch(keys, found, misses, self._parse_search_batch(miss_queries, result))
+        return self._merge_batch(keys, found, misses, [])
+
+    async def asearch_places_batch(self, queries: List[str], location: Dict[str, float] = None, radius: int = 10000) -> List[List[Dict]]:
+        """Async search_places_batch."""
+        if not _valid_location(location):
+            logger.warning("Skipping place searches with invalid location %s", location)
+            return [[] for _ in queries]
+        keys, found, misses = self._split_cached(queries, location, radius)
+        if misses:
+            miss_queries = [queries[i] for i in misses]
+            result = await self.acall_tool(SEARCH_BATCH_TOOL, self._search_batch_args(miss_queries, location, radius))
+            return self._merge_batch(keys, found, misses, self._parse_search_batch(miss_queries, result))
+        return self._merge_batch(keys, found, misses, [])
+
+    @staticmethod
+    def _parse_places(query: str, result: Dict[str, Any]) -> Optional[List[Dict]]:
+        """Places from a search result, or None if the call failed (so it isn't cached)."""
+        if result.get("isError"):
+            logger.warning("Search failed for query '%s': %s", query, result)
+            return None
 
         try:
-            # The actual place data is a JSON string inside the 'text' field
-            content = result["content"][0]["text"]
-            data = json.loads(content)
+            # Prefer the server's structuredContent; older servers only send it as a JSON string in 'text'
+            data = result.get("structuredContent") or orjson.loads(result["content"][0]["text"])
             return data.get("places", [])
-        except (json.JSONDecodeError, KeyError, IndexError, TypeError) as e:
-            print(f"Error parsing search results for query '{query}': {e}")
-            return []
+        except (orjson.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+            logger.error("Error parsing search results for query '%s': %s", query, e)
+            return None
+
+    # --- Geocoding ---
 
     def geocode(self, address: str) -> Dict[str, float]:
-        """Geocode an address to get coordinates."""
-        result = self.call_tool("maps_geocode", {"address": address})
+        """Geocode an address to get coordinates, reusing earlier results for the same address."""
+        if not _valid_text(address):
+            return {}
+        key = _normalize_text(address)
+        coords = _get_geocode(key)
+        if coords is None:
+            coords = self._parse_geocode(address, self.call_tool("maps_geocode", {"address": address}))
+            if not coords:
+                return {}
+            _put_geocode(key, coords)
+        return dict(coords)
+
+    async def ageocode(self, address: str) -> Dict[str, float]:
+        """Async geocode."""
+        if not _valid_text(address):
+            return {}
+        key = _normalize_text(address)
+        coords = _get_geocode(key)
+        if coords is None:
+            coords = self._parse_geocode(address, await self.acall_tool("maps_geocode", {"address": address}))
+            if not coords:
+                return {}
+            _put_geocode(key, coords)
+        return dict(coords)
 
+    @staticmethod
+    def _parse_geocode(address: str, result: Dict[str, Any]) -> Dict[str, float]:
         if result.get("isError"):
-            print(f"Geocoding failed for '{address}': {result}")
+            logger.warning("Geocoding failed for '%s': %s", address, result)
             return {}
 
         try:
-            # The actual geocode data is a JSON string inside the 'text' field
-            content = result["content"][0]["text"]
-            data = json.loads(content)
+            data = result.get("structuredContent") or orjson.loads(result["content"][0]["text"])
             # The geocode tool returns the full details, we just need the location
             if "location" in data:
                 return data["location"]
             return {}
-        except (json.JSONDecodeError, KeyError, IndexError, TypeError) as e:
-            print(f"Error parsing geocoding results for '{address}': {e}")
+        except (orjson.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+            logger.error("Error parsing geocoding results for '%s': %s", address, e)
             return {}
-    
+
+    @staticmethod
+    def _split_geocodes(addresses: List[str]):
+        # One entry per distinct normalized address, found in the cache or None for a miss
+        keys = [_normalize_text(address) if _valid_text(address) else None for address in addresses]
+        first = {}
+        for address, key in zip(addresses, keys):
+            if key is not None:
+                first.setdefault(key, address)
+        found = {key: _get_geocode(key) for key in first}
+        misses = [key for key, coords in found.items() if coords is None]
+        calls = [("maps_geocode", {"address": first[key]}) for key in misses]
+        return keys, first, found, misses, calls
+
+    def _merge_geocodes(self, keys, first, found, misses, results) -> List[Dict[str, float]]:
+        for key, result in zip(misses, results):
+            coords = self._parse_geocode(first[key], result)
+            if coords:
+                _put_geocode(key, coords)
+            found[key] = coords
+        return [dict(found[key]) if key is not None and found[key] else {} for key in keys]
+
+    def geocode_many(self, addresses: List[str]) -> List[Dict[str, float]]:
+        """Geocode several addresses; results line up with `addresses`, {} where geocoding failed.
+
+        Cached and repeated addresses are answered locally; the rest go to the server as one
+        JSON-RPC batch of maps_geocode calls, or one by one if it can't take batches.
+        """
+        keys, first, found, misses, calls = self._split_geocodes(addresses)
+        results = []
+        if calls:
+            try:
+                results = self.call_tools_batch(calls)
+            except MCPBatchNotSupported as e:
+                logger.warning("Batched geocoding unavailable, falling back to single calls: %s", e)
+                results = [self.call_tool(name, args) for name, args in calls]
+        return self._merge_geocodes(keys, first, found, misses, results)
+
+    async def ageocode_many(self, addresses: List[str]) -> List[Dict[str, float]]:
+        """Async geocode_many; without batch support the calls run concurrently."""
+        keys, first, found, misses, calls = self._split_geocodes(addresses)
+        results = []
+        if calls:
+            try:
+                results = await self.acall_tools_batch(calls)
+            except MCPBatchNotSupported as e:
+                logger.warning("Batched geocoding unavailable, falling back to concurrent calls: %s", e)
+                results = await asyncio.gather(*(self.acall_tool(name, args) for name, args in calls))
+        return self._merge_geocodes(keys, first, found, misses, results)
+
+    # --- Routing ---
+
     def calculate_distance_matrix(self, origins: List[str], destinations: List[str], mode: str = "driving") -> Dict:
-        """Calculate distances between multiple origins and destinations."""
+        """Calculate distances between multiple origins and destinations.
+
+        Returns the server's decoded matrix ({"results": [{"elements": [...]}, ...], plus the
+        resolved addresses), one row per origin, or {} if the call failed.
+        """
         args = {
             "origins": origins,
             "destinations": destinations,
             "mode": mode
         }
-        return self.call_tool("maps_distance_matrix", args)
+        result = self.call_tool("maps_distance_matrix", args)
+        if result.get("isError"):
+            logger.warning("Distance matrix failed: %s", result)
+            return {}
+
+        try:
+            return result.get("structuredContent") or orjson.loads(result["content"][0]["text"])
+        except (orjson.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+            logger.error("Error parsing distance matrix: %s", e)
+            return {}
 
     def get_directions(self, origin: str, destination: str, mode: str = "driving") -> Dict:
-        """Get detailed directions between two points."""
+        """Get detailed directions between two points: the first route's summary, distance,
+        duration and steps, or {} if the server found none."""
         args = {
             "origin": origin,
             "destination": destination,
             "mode": mode
         }
-        return self.call_tool("maps_directions", args)
\ No newline at end of file
+        return self._parse_directions(origin, destination, self.call_tool("maps_directions", args))
+
+    async def aget_directions(self, origin: str, destination: str, mode: str = "driving") -> Dict:
+        """Async get_directions."""
+        result = await self.acall_tool("maps_directions", {"origin": origin, "destination": destination, "mode": mode})
+        return self._parse_directions(origin, destination, result)
+
+    @staticmethod
+    def _parse_directions(origin: str, destination: str, result: Dict[str, Any]) -> Dict:
+        if result.get("isError"):
+            logger.warning("Directions failed from '%s' to '%s': %s", origin, destination, result)
+            return {}
+
+        try:
+            data = result.get("structuredContent") or orjson.loads(result["content"][0]["text"])
+            # Each route carries its first leg's distance, duration and steps; the first route is the recommended one
+            routes = data.get("routes") or [{}]
+            return routes[0]
+        except (orjson.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+            logger.error("Error parsing directions from '%s' to '%s': %s", origin, destination, e)
+            return {}
+
+
+@lru_cache(maxsize=1)
+def get_mcp() -> MCPClient:
+    """Process-wide MCPClient for the configured server. It keeps no per-call state and its
+    connection pools are shared and thread-safe, so every node and thread can use this one."""
+    return MCPClient()
@@ -1,29 +1,39 @@
+import numpy as np
+
+# Inputs the chat front ends answer themselves; they never need planning or memory lookups
+EXIT_COMMANDS = frozenset({'exit', 'quit', 'bye'})
+MEMORY_COMMAND = 'memory'
+CHAT_COMMANDS = EXIT_COMMANDS | {MEMORY_COMMAND, 'clear memory'}
+
+
+def _distance_array(distance_matrix) -> np.ndarray:
+    """Decoded maps_distance_matrix result as an (origins x destinations) array of meters; unreachable pairs are inf."""
+    return np.array([
+        [
+            element.get('distance', {}).get('value', np.inf) if element.get('status', 'OK') == 'OK' else np.inf
+            for element in row['elements']
+        ]
+        for row in distance_matrix['results']
+    ], dtype=np.float32)
 
 def _cluster_places_by_distance(places, distance_matrix, max_daily_distance=10000):
-    """Simple greedy clustering: Group places within distance limit."""
-    # Assume distance_matrix['rows'][i]['elements'][j]['distance']['value'] gives meters
-    clusters = []
-    remaining = places.copy()
-    
-    while remaining:
-        cluster = [remaining[0]]
-        remaining = remaining[1:]
-        total_distance = 0
-        
-        for place in remaining:
-            # Find distance from last in cluster to this place
-            last_idx = next(i for i, p in enumerate(places) if p.place_id == cluster[-1].place_id)
-            this_idx = next(i for i, p in enumerate(places) if p.place_id == place.place_id)
-            dist = distance_matrix['rows'][last_idx]['elements'][this_idx]['distance']['value']
-            
-            if total_distance + dist <= max_daily_distance:
-                cluster.append(place)
-                total_distance += dist
-            else:
-                break
-        
-        clusters.append(cluster)
-    
+    """Simple greedy clustering: split places, in order, into runs whose legs total at most max_daily_distance.
+
+    places[i] must be the i-th origin and destination of distance_matrix.
+    """
+    if not places:
+        return []
+    # Leg i runs from place i to place i + 1, read off the matrix's first superdiagonal in one go
+    legs = np.diagonal(_distance_array(distance_matrix), offset=1)[:len(places) - 1].tolist()
+
+    clusters, start, total_distance = [], 0, 0.0
+    for i, dist in enumerate(legs):
+        if total_distance + dist <= max_daily_distance:
+            total_distance += dist
+        else:
+            clusters.append(places[start:i + 1])
+            start, total_distance = i + 1, 0.0
+    clusters.append(places[start:])
     return clusters
 
 def _parse_duration_to_days(duration: str) -> int:
@@ -41,11 +51,10 @@ def _basic_travel_plan(state, places, preferences):
 
 def _generate_basic_narrative(itineraries, preferences, memory_context):
     """Fallback narrative."""
-    text = f"**Duration:** {preferences.duration}\n**Budget:** {preferences.budget}\n"
+    parts = [f"**Duration:** {preferences.duration}\n**Budget:** {preferences.budget}\n"]
     for itinerary in itineraries:
-        text += f"\n**Day {itinerary['day']}:**\n"
-        for place in itinerary['places']:
-            text += f"- {place.name} ({place.rating}⭐)\n"
-        text += f"{itinerary['route']}\n"
-    text += f"\n**Memory Notes:** {memory_context}"
-    return text
+        parts.append(f"\n**Day {itinerary['day']}:**\n")
+        parts.extend(f"- {place.name} ({place.rating}⭐)\n" for place in itinerary['places'])
+        parts.append(f"{itinerary['route']}\n")
+    parts.append(f"\n**Memory Notes:** {memory_context}")
+    return "".join(parts)
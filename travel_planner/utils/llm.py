@@ -0,0 +1,18 @@
+from functools import lru_cache
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from config.settings import settings
+
+
+@lru_cache(maxsize=None)
+def get_llm(temperature: float) -> ChatGoogleGenerativeAI:
+    """Build each temperature's client once per process and reuse it (and its HTTP connections)
+    across graph steps and MemGPT instances."""
+    return ChatGoogleGenerativeAI(model=settings.LLM_MODEL, temperature=temperature, api_key=settings.GEMINI_API_KEY)
+
+
+@lru_cache(maxsize=None)
+def get_structured(temperature: float, schema_cls: type):
+    """Structured-output runnable for `schema_cls`, so the tool schema is only generated once."""
+    return get_llm(temperature).with_structured_output(schema_cls)
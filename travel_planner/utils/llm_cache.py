@@ -0,0 +1,207 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.sqlite3")
+
+
+def _prompt_to_text(prompt: Any) -> str:
+    """Flatten a prompt (plain string or list of chat messages) into the text that gets embedded."""
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(f"{m.get('role', 'unknown')}: {m.get('content', '')}" for m in prompt)
+
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class SemanticLLMCache:
+    """Caches structured LLM responses in sqlite, matched by exact key or by prompt similarity.
+
+    Exact keys suit prompts that are fully determined by structured input (e.g. the
+    user's preferences), while semantic lookups catch re-phrasings of the same request.
+    """
+
+    def __init__(
+        self,
+        schema: Type[BaseModel],
+        namespace: str,
+        ttl_seconds: int,
+        threshold: float = 0.92,
+        embeddings=None,
+        accept: Optional[Callable[[str, BaseModel], bool]] = None,
+        db_path: str = DEFAULT_CACHE_PATH,
+    ):
+        self.schema = schema
+        # Computed once; keying entries on it means a changed response schema never reads stale rows
+        self.schema_fingerprint = hashlib.sha256(
+            json.dumps(schema.model_json_schema(), sort_keys=True).encode("utf-8")
+        ).hexdigest()[:12]
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.accept = accept
+        self.db_path = db_path
+        self._embeddings = embeddings
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+            self._embeddings = GoogleGenerativeAIEmbeddings(
+                model="models/embedding-001",
+                google_api_key=os.getenv("GEMINI_API_KEY")
+            )
+        return self._embeddings
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                    namespace TEXT NOT NULL,
+                    cache_key TEXT,
+                    prompt TEXT NOT NULL,
+                    embedding BLOB,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_ns_key ON llm_cache (namespace, cache_key)")
+        return self._conn
+
+    def _scope(self, user_id: str) -> str:
+        return f"{user_id}:{self.namespace}:{self.schema_fingerprint}"
+
+    @staticmethod
+    def _hash_key(cache_key: Any) -> str:
+        return hashlib.sha256(json.dumps(cache_key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _lookup_exact(self, scope: str, key: str) -> Optional[BaseModel]:
+        row = self._connect().execute(
+            "SELECT response FROM llm_cache WHERE namespace = ? AND cache_key = ? AND created_at >= ? "
+            "ORDER BY created_at DESC LIMIT 1",
+            (scope, key, time.time() - self.ttl_seconds)
+        ).fetchone()
+        return self.schema.model_validate_json(row[0]) if row else None
+
+    def _lookup_similar(self, scope: str, text: str, embedding: List[float]) -> Optional[BaseModel]:
+        rows = self._connect().execute(
+            "SELECT embedding, response FROM llm_cache WHERE namespace = ? AND cache_key IS NULL AND created_at >= ?",
+            (scope, time.time() - self.ttl_seconds)
+        ).fetchall()
+
+        best_score, best_response = 0.0, None
+        for blob, response in rows:
+            score = cosine_similarity(embedding, array("f", blob))
+            if score > best_score:
+                best_score, best_response = score, response
+
+        if best_response is None or best_score < self.threshold:
+            return None
+        cached = self.schema.model_validate_json(best_response)
+        if self.accept and not self.accept(text, cached):
+            return None
+        return cached
+
+    def _store(self, scope: str, key: Optional[str], text: str, embedding: Optional[List[float]], response: BaseModel):
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO llm_cache (namespace, cache_key, prompt, embedding, response, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                scope,
+                key,
+                text,
+                array("f", embedding).tobytes() if embedding is not None else None,
+                response.model_dump_json(),
+                time.time(),
+            )
+        )
+        conn.commit()
+
+    def invoke(
+        self,
+        runnable,
+        prompt: Any,
+        user_id: str = "default_user",
+        cache_key: Optional[Dict[str, Any]] = None,
+        no_cache: bool = False,
+    ) -> BaseModel:
+        """Return a cached response for `prompt` if one matches, otherwise call `runnable` and store the result.
+
+        Pass `cache_key` to match on exact structured input instead of prompt similarity,
+        and `no_cache=True` for prompts that must never be stored.
+        """
+        if no_cache:
+            return runnable.invoke(prompt)
+
+        scope = self._scope(user_id)
+        text = _prompt_to_text(prompt)
+        key = self._hash_key(cache_key) if cache_key is not None else None
+        embedding = None
+
+        if key is not None:
+            cached = self._lookup_exact(scope, key)
+        else:
+            embedding = self.embeddings.embed_query(text)
+            cached = self._lookup_similar(scope, text, embedding)
+
+        if cached is not None:
+            logger.info("LLM cache hit (%s)", self.namespace)
+            return cached
+
+        response = runnable.invoke(prompt)
+        if isinstance(response, self.schema):
+            self._store(scope, key, text, embedding, response)
+        return response
+
+
+# Queries this similar (cosine, in embedding space) are treated as the same search
+QUERY_DEDUPE_THRESHOLD = 0.9
+_NON_WORD_RE = re.compile(r"\W+")
+
+
+def dedupe_queries(queries: List[Any], cache: SemanticLLMCache) -> List[Any]:
+    """Drop near-duplicate search queries ("best restaurants in Paris" vs "top restaurants, Paris"),
+    keeping the higher priority one; `cache` supplies the embeddings."""
+    ranked = sorted(queries, key=lambda q: q.priority, reverse=True)
+
+    # Duplicates that differ only in case and punctuation need no embeddings
+    seen, unique = set(), []
+    for query in ranked:
+        key = _NON_WORD_RE.sub(" ", query.query.lower()).strip()
+        if key not in seen:
+            seen.add(key)
+            unique.append(query)
+
+    if len(unique) < 2:
+        return unique
+
+    try:
+        embeddings = cache.embeddings.embed_documents([q.query for q in unique])
+    except Exception as e:
+        logger.warning("Skipping semantic query dedupe: %s", e)
+        return unique
+
+    kept, kept_embeddings = [], []
+    for query, embedding in zip(unique, embeddings):
+        if all(cosine_similarity(embedding, other) <= QUERY_DEDUPE_THRESHOLD for other in kept_embeddings):
+            kept.append(query)
+            kept_embeddings.append(embedding)
+    return kept
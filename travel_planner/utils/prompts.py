@@ -74,4 +74,45 @@ You think: Check if user has been to Barcelona or Spain before
 4. [Review results, found mentions 6 months ago]
 5. send_message("I see you were interested in Barcelona 6 months ago! Let's plan that trip...")
 
-Remember: You control your own memory. Be strategic about what you save and retrieve."""
\ No newline at end of file
+Remember: You control your own memory. Be strategic about what you save and retrieve."""
+
+# Static instructions go first in their own system message, with everything that varies per
+# turn in the user message after them, so repeated calls share a byte-identical prefix that
+# Gemini's implicit context cache can serve.
+TRIP_EXTRACTION_INSTRUCTIONS = """From the latest user message, extract the destination and duration for a specific trip.
+Do not guess or assume values. The user must explicitly state they are ready to plan a trip."""
+
+# Extraction and query generation fused into one call, so a fully specified trip goes straight to searching
+PLAN_BOOTSTRAP_INSTRUCTIONS = f"""{TRIP_EXTRACTION_INSTRUCTIONS}
+Return them in the "preferences" field.
+
+Only if both the destination and the duration are known (from the latest message or the known preferences),
+also fill the "queries" field with 6-8 strategic Google Maps search queries for that destination, based on
+the user's profile and known preferences:
+- Top attractions matching their interests
+- Restaurants fitting their budget
+- Activities suitable for their companions
+- Must-see items they mentioned
+
+Each query object should have:
+- category: string (e.g., "Restaurants", "Attractions", "Activities")
+- query: string (the search query for Google Maps, specific to the destination)
+- priority: integer (1-5, where 5 is most important, based on their stated interests)
+
+Otherwise leave "queries" empty."""
+
+SEARCH_QUERY_INSTRUCTIONS = """Create 6-8 strategic Google Maps search queries for the user's destination.
+
+Generate diverse queries covering:
+- Top attractions matching their interests
+- Restaurants fitting their budget
+- Activities suitable for their companions
+- Must-see items they mentioned
+
+Make queries specific to the destination and prioritize based on their stated interests.
+
+Return a JSON object with a "queries" field containing an array of objects.
+Each query object should have:
+- category: string (e.g., "Restaurants", "Attractions", "Activities")
+- query: string (the search query for Google Maps)
+- priority: integer (1-5, where 5 is most important)"""